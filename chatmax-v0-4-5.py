@@ -10,19 +10,44 @@
 # Imports
 # GUI
 import tkinter as tk
-from tkinter import scrolledtext, filedialog, messagebox
-# HTTP Calls
-import requests
+from tkinter import scrolledtext, messagebox
+# Asyncio event loop that multiplexes every API call in one background thread
+import asyncio
 # JSON file handling to store preferences and settings at appropriate level
 import json
-# Threading for background API calls
+# Faster JSON parsing and encoding for settings/preferences/presets/conversations when
+# orjson is installed (both encoders write UTF-8 text as-is, like ensure_ascii=False)
+try:
+    import orjson
+    _loads = orjson.loads
+
+    def _dumps(obj, indent: bool = True) -> str:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option).decode('utf-8')
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj, indent: bool = True) -> str:
+        if indent:
+            return json.dumps(obj, ensure_ascii=False, indent=2)
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+# Threading to host the background network event loop
 import threading
 # Time for timestamps and preference entry tracking
 import time
 # OS for file paths
 import os
-# OpenAI client for efficient and convenient local API calls
-from openai import OpenAI
+# Hashes to verify file writes before they replace the original
+import hashlib
+# Memoized timestamp formatting
+from functools import lru_cache
+# Dataclass container for the mutable chat state
+from dataclasses import dataclass, field
+# Bounded short-term history (appends evict the oldest entry)
+from collections import deque
+# Imported lazily where first needed, to keep them off the startup path:
+# httpx (async HTTP client) and openai (AsyncOpenAI) pull in a large dependency tree,
+# tkinter's filedialog/simpledialog are only needed when a dialog is opened
 
 
 # Constants
@@ -32,12 +57,28 @@ from openai import OpenAI
 PREFS_PATH = os.path.join(os.path.dirname(__file__), 'preferences.json')
 # Settings are stored in 'settings.json' as key-value pair dict of configuration options
 SETTINGS_PATH = os.path.join(os.path.dirname(__file__), 'settings.json')
+# Presets keep the last selection in 'presets.json', saved personalities live in 'personalities/'
+PRESETS_PATH = os.path.join(os.path.dirname(__file__), 'presets.json')
+PRESETS_DIR = os.path.join(os.path.dirname(__file__), 'personalities')
+CONV_DIR = os.path.join(os.path.dirname(__file__), 'conversations')
 
 # Defaults
 # Default maximum chat history entries to keep (can be changed by user via UI)
 HISTORY_DEFAULT_LINES = 20
 # Default maximum preference entries to keep (can be changed by user via UI)
 PREFS_DEFAULT_LINES = 20
+# Number of conversation entries rendered at a time, older ones are paged in on scroll
+CHAT_RENDER_WINDOW = 100
+# Maximum number of lines kept in the chat area (whole entries are dropped from the top)
+CHAT_MAX_LINES = 5000
+# Run preference extraction once every this many user messages (it covers all of them)
+PREFS_EXTRACT_EVERY = 5
+# Seconds exit waits for the extraction of not yet extracted messages
+PREFS_FLUSH_TIMEOUT = 15
+# Size at which a .writejournal.jsonl is rotated to .writejournal.jsonl.1
+WRITE_JOURNAL_MAX_BYTES = 64 * 1024
+# Display format for message timestamps (entries store integer epoch seconds)
+TS_FORMAT = '%Y-%m-%d %H:%M:%S'
 
 # OpenAI API key storage (prompt at startup if not present)
 OPENAI_API_KEY = None
@@ -53,19 +94,175 @@ DEFAULT_PRESETS = {
     'Sailor-Mouth': (0, 0, 2, 30, 1, 1, 2, 0),
 }
 
+# Summary wording for each personality slider, indexed by slider value
+FRIENDLINESS_TONES = ('reserved', 'somewhat reserved', 'friendly', 'very friendly')
+PROFESSIONALISM_TONES = ('casual', 'somewhat professional', 'professional')
+PROFANITY_TONES = ('clean language', 'somewhat coarse language', 'coarse language')
+GENDER_TONES = ('masculine', 'gender neutral', 'feminine')
+HUMOUR_TONES = ('no humour', 'mild humour', 'strong humour')
+SARCASM_TONES = ('no sarcasm', 'mild sarcasm', 'strong sarcasm')
+EXTROVERSION_TONES = ('introverted', 'neutral extroversion', 'extroverted')
+
+# Personality instruction phrases for each slider, indexed by slider value
+FRIENDLINESS_PHRASES = ('Be very reserved and blunt.', 'Be slightly reserved.', 'Be friendly and kind.', 'Be very friendly, kind and warm.')
+PROFESSIONALISM_PHRASES = ('Use casual wording.', 'Be somewhat professional.', 'Maintain a professional tone.')
+PROFANITY_PHRASES = (
+    'No profanity; use clean language.',
+    'Profanity allowed: moderate (may use mild swear words).',
+    'Profanity allowed: high (use strong coarse language as much as possible if it makes sense).',
+)
+# Used instead of PROFANITY_PHRASES for ages 15 and under, regardless of the profanity slider
+YOUTH_PROFANITY_PHRASE = 'Do not use profanity under any circumstances; avoid coarse language due to youthful voice.'
+GENDER_PHRASES = ('Use a masculine voice/wording.', 'Use neutral wording.', 'Use a feminine voice/wording.')
+HUMOUR_PHRASES = ('Avoid humour; be straightforward.', 'Use some humour occasionally.', 'Try and be comedic as much as possible where appropriate.')
+SARCASM_PHRASES = (
+    'Do not use sarcasm; be literal and sincere.',
+    'Sarcasm permitted: mild irony allowed.',
+    'Sarcasm permitted: use sharp, ironic remarks as much as possible if fitting.',
+)
+EXTROVERSION_PHRASES = (
+    "Favor solitary/quiet hobbies and mention mild nervousness or reserve in social situations when relevant. Do not be excitable, for instance lay off of exclamation marks unless absolutely necessary.",
+    'No particular bias toward extroversion or introversion.',
+    'Favor social/outgoing hobbies and confident wording. Be excitable and enthusiastic where appropriate, expressing with exclamation marks more often than not.',
+)
+
+# Networking
+# Event loop running on a daemon thread, all API calls are scheduled onto it
+_net_loop = None
+_net_loop_lock = threading.Lock()
+# Shared async HTTP client (one connection pool for server and OpenAI calls)
+_http_client = None
+# AsyncOpenAI client and the API key it was constructed with
+_openai_client = None
+_openai_client_key = None
+# Extra chat.completions arguments per model name (gpt-5 models take reasoning/verbosity)
+_MODEL_KWARGS = {}
+
+# Caches
+# settings.json as stored (raw) and normalized for load_settings, and the mtime
+# they match (kept current by save_settings, guarded by _settings_lock)
+_settings_lock = threading.RLock()
+# Serializes appends to and rotation of the .writejournal.jsonl files (_journal_write)
+_journal_lock = threading.Lock()
+_settings_raw = None
+_settings_cache = None
+_settings_mtime = None
+# Stripped preferences.json text and parsed entries, and the mtime they were read at
+_prefs_cache = None
+_prefs_mtime = None
+# Rendered chat segments keyed by full_history index -> [(text, tags), ...]
+_render_cache = {}
+# personalities/*.json presets (name -> values), the directory mtime they were
+# scanned at, and file name -> (mtime, values) so a rescan only re-parses changed files
+_disk_presets = None
+_disk_presets_mtime = None
+_disk_preset_files = {}
+# Parsed presets.json and the mtime it was read at
+_presets_json = None
+_presets_json_mtime = None
+# Preset values tuple -> preset name (built-ins and personalities/), and the
+# _disk_presets dict it was built from
+_preset_index = None
+_preset_index_source = None
+# Index of the first full_history entry currently shown in the chat area
+_rendered_start = 0
+# (id, version) of the full_history the chat area currently shows
+_rendered_version = None
+# Set while an older page of entries is waiting to be inserted
+_page_in_pending = False
+# Personality instruction text keyed by the slider values tuple
+_PERSONALITY_CACHE = {}
+# Pending root.after id for the debounced summary refresh
+_summary_after_id = None
+# Text last set on summary_label, so it never has to be read back from Tk
+_last_summary_text = ''
+
+
+# State
+
+@dataclass
+class History:
+    # Conversation log stored column-wise, entry i is (roles[i], msgs[i], ts[i])
+    # with ts in epoch seconds, tags[i] is the chat area tag for the role.
+    # The columns are updated one after another, so it must only be changed on
+    # the Tk thread (where it is also rendered), never from the network loop
+    roles: list = field(default_factory=list)
+    msgs: list = field(default_factory=list)
+    ts: list = field(default_factory=list)
+    tags: list = field(default_factory=list)
+    # Bumped on every change, so a rendered copy can tell whether it is current
+    version: int = 0
+
+    def __len__(self):
+        return len(self.roles)
+
+    def append(self, role: str, msg: str, ts: int):
+        self.roles.append(role)
+        self.msgs.append(msg)
+        self.ts.append(ts)
+        self.tags.append(_role_tag(role))
+        self.version += 1
+
+    def extend(self, rows):
+        # rows of (role, message, ts), added column by column with one version bump
+        rows = list(rows)
+        if not rows:
+            return
+        roles, msgs, ts = zip(*rows)
+        self.roles.extend(roles)
+        self.msgs.extend(msgs)
+        self.ts.extend(ts)
+        self.tags.extend([_role_tag(role) for role in roles])
+        self.version += 1
+
+    def clear(self):
+        self.roles.clear()
+        self.msgs.clear()
+        self.ts.clear()
+        self.tags.clear()
+        self.version += 1
+
+    def rows(self) -> list:
+        # [role, message, ts] lists, the layout conversation files are saved in
+        return [list(row) for row in zip(self.roles, self.msgs, self.ts)]
+
+
+@dataclass
+class ChatState:
+    # Short-term history sent to the model as context (a deque with maxlen=history_limit)
+    history: deque = field(default_factory=deque)
+    # Untrimmed conversation log, shown in the chat area and saved to disk
+    full_history: History = field(default_factory=History)
+    # File the conversation was last saved to/loaded from (None for a new conversation)
+    current_conversation_path: str = None
+    # True once the conversation has changed since it was last saved/loaded
+    unsaved_changes: bool = False
+    # _history_digest() of full_history as last saved/loaded (None if never)
+    saved_digest: str = None
+    # User messages sent since preferences were last extracted, kept apart from
+    # history so history_limit never hides one from the extractor
+    pending_prefs_msgs: list = field(default_factory=list)
+    # Runtime limits for short-term history and stored preference lines
+    history_limit: int = HISTORY_DEFAULT_LINES
+    prefs_limit: int = PREFS_DEFAULT_LINES
+
+
+# Chat state shared by the callbacks below (created by build_main_window)
+STATE = None
+
 
 # Functions
 
 # Startup Functions (run on startup)
 
 def build_main_window():
-    global root, menubar, settings_menu, use_local_var, HISTORY_LIMIT, PREFS_LIMIT, OPENAI_API_KEY, SERVER_ENDPOINT, endpoint, history, full_history, current_conversation_path, unsaved_changes, conv_title, chat_area, entry, send_btn, show_timestamps_var, show_ts_cb, summary_label, friendliness_var, professionalism_var, profanity_var, age_var, gender_var, humor_var, sarcasm_var, introversion_var
+    global STATE, root, menubar, settings_menu, use_local_var, OPENAI_API_KEY, SERVER_ENDPOINT, endpoint, conv_title, chat_area, entry, send_btn, show_timestamps_var, show_ts_cb, summary_label, friendliness_var, professionalism_var, profanity_var, age_var, gender_var, humor_var, sarcasm_var, introversion_var
+
+    # Initialize chat state (history, saved-state tracking and limits)
+    STATE = ChatState()
 
-    # Initialize global variables
-    history = []
-    full_history = []
-    current_conversation_path = None
-    unsaved_changes = False
+    # Load persisted settings once, everything below reads from this dict
+    _loaded_settings = load_settings() or {}
 
     # Tkinter root window
     root = tk.Tk()
@@ -93,13 +290,8 @@ def build_main_window():
 
     # Settings menu
     settings_menu = tk.Menu(menubar, tearoff=0)
-    # Ensure use_local_var exists (loaded earlier near UI setup, if not, provide default)
-    if 'use_local_var' not in globals():
-        try:
-            _loaded_settings = load_settings()
-            use_local_var = tk.BooleanVar(value=bool(_loaded_settings.get('use_local_ai', True)))
-        except Exception:
-            use_local_var = tk.BooleanVar(value=True)
+    # Persisted use_local_ai choice, exposed as a Tk var for menu toggling
+    use_local_var = tk.BooleanVar(value=bool(_loaded_settings.get('use_local_ai', True)))
 
     settings_menu.add_checkbutton(label='Use Local OpenAI API Key', variable=use_local_var, command=toggle_use_local)
     settings_menu.add_command(label='API Key...', command=manage_api_key)
@@ -116,12 +308,15 @@ def build_main_window():
     conv_title.pack(pady=(8,0))
 
     # Read-only chat area
-    chat_area = scrolledtext.ScrolledText(root, wrap=tk.WORD, width=70, height=20)
+    # Undo is disabled so the widget does not keep an ever-growing edit history
+    chat_area = scrolledtext.ScrolledText(root, wrap=tk.WORD, width=70, height=20, undo=False, autoseparators=False, maxundo=0)
     chat_area.pack(padx=10, pady=6, fill=tk.BOTH, expand=True)
     chat_area.config(state=tk.DISABLED)
     # Configure tags for colored labels
     chat_area.tag_configure('user_label', foreground='#003366', font=(None, 10, 'bold'))
     chat_area.tag_configure('assistant_label', foreground='#b30000', font=(None, 10, 'bold'))
+    # Watch scrolling so older entries can be paged in when the top is reached
+    chat_area.configure(yscrollcommand=_on_chat_yscroll)
 
     entry_frame = tk.Frame(root)
     entry_frame.pack(fill=tk.X, padx=10, pady=(0,10))
@@ -153,135 +348,70 @@ def build_main_window():
     summary_label.pack(padx=8, pady=(4,6))
 
     # Toggle to show/hide timestamps in the chat display
-    show_ts_cb = tk.Checkbutton(root, text='Show timestamps', variable=show_timestamps_var, command=render_history)
+    show_ts_cb = tk.Checkbutton(root, text='Show timestamps', variable=show_timestamps_var, command=apply_timestamp_visibility)
     show_ts_cb.pack(padx=8, pady=(0,6), anchor='w')
-
-    # Load persisted settings (use_local_ai) and expose a Tk var for menu toggling
-    try:
-        # _loaded_settings = load_settings()
-        # If use_local_var already exists (created earlier for the settings menu), reuse it
-        if 'use_local_var' in globals() and isinstance(use_local_var, tk.BooleanVar):
-            try:
-                use_local_var.set(bool(_loaded_settings.get('use_local_ai', True)))
-            except Exception:
-                pass
-        else:
-            use_local_var = tk.BooleanVar(value=bool(_loaded_settings.get('use_local_ai', True)))
-    except Exception:
-        if 'use_local_var' in globals() and isinstance(use_local_var, tk.BooleanVar):
-            try:
-                use_local_var.set(True)
-            except Exception:
-                pass
-        else:
-            use_local_var = tk.BooleanVar(value=True)
+    apply_timestamp_visibility()
 
     # Initialize runtime history & preference limits from settings (clamp to reasonable bounds)
+    # A stored 0 is a valid limit, so only a missing/invalid value falls back to the default
     try:
-        _hist_val = None
-        try:
-            _hist_val = int(_loaded_settings.get('ai_history_lines')) if isinstance(_loaded_settings, dict) and _loaded_settings.get('ai_history_lines') is not None else None
-        except Exception:
-            _hist_val = None
-        if _hist_val is None:
-            HISTORY_LIMIT = HISTORY_DEFAULT_LINES
-        else:
-            HISTORY_LIMIT = max(0, min(50, int(_hist_val)))
+        _hist_val = _loaded_settings.get('ai_history_lines')
+        STATE.history_limit = HISTORY_DEFAULT_LINES if _hist_val is None else max(0, min(50, int(_hist_val)))
     except Exception:
-        HISTORY_LIMIT = HISTORY_DEFAULT_LINES
+        STATE.history_limit = HISTORY_DEFAULT_LINES
     try:
-        _pref_val = None
-        try:
-            _pref_val = int(_loaded_settings.get('pref_memory_lines')) if isinstance(_loaded_settings, dict) and _loaded_settings.get('pref_memory_lines') is not None else None
-        except Exception:
-            _pref_val = None
-        if _pref_val is None:
-            PREFS_LIMIT = PREFS_DEFAULT_LINES
-        else:
-            PREFS_LIMIT = max(0, min(50, int(_pref_val)))
+        _pref_val = _loaded_settings.get('pref_memory_lines')
+        STATE.prefs_limit = PREFS_DEFAULT_LINES if _pref_val is None else max(0, min(50, int(_pref_val)))
     except Exception:
-        PREFS_LIMIT = PREFS_DEFAULT_LINES
+        STATE.prefs_limit = PREFS_DEFAULT_LINES
+    STATE.history = deque(maxlen=STATE.history_limit)
 
-    # On startup, attempt to apply the last selected preset stored in presets.json
-    try:
-        presets_path = os.path.join(os.path.dirname(__file__), 'presets.json')
-        presets_dir = os.path.join(os.path.dirname(__file__), 'personalities')
-        last_selected = None
-        if os.path.exists(presets_path):
-            try:
-                with open(presets_path, 'r', encoding='utf-8') as pf:
-                    loaded = json.load(pf)
-                last_selected = loaded.get('last_selected') if isinstance(loaded, dict) else None
-            except Exception:
-                last_selected = None
+    # Read the last selected preset from presets.json once, it is used both to
+    # apply the preset values and for the conversation title further below
+    last_selected = _load_presets_json().get('last_selected')
 
+    # On startup, attempt to apply the last selected preset
+    try:
         # Only apply if last_selected is a built-in preset or a file in personalities/
         if last_selected:
             applied = False
             if last_selected in DEFAULT_PRESETS:
-                vals = DEFAULT_PRESETS[last_selected]
-                friendliness_var.set(vals[0])
-                professionalism_var.set(vals[1])
-                profanity_var.set(vals[2])
-                age_var.set(vals[3])
-                gender_var.set(vals[4])
-                humor_var.set(vals[5])
-                sarcasm_var.set(vals[6])
-                introversion_var.set(vals[7])
+                _apply_preset_values(DEFAULT_PRESETS[last_selected])
                 applied = True
             else:
                 # check personalities/ for a matching file
                 try:
-                    fn = os.path.join(presets_dir, f"{last_selected}.json")
+                    fn = os.path.join(PRESETS_DIR, f"{last_selected}.json")
                     if os.path.exists(fn):
                         with open(fn, 'r', encoding='utf-8') as pf:
-                            loaded = json.load(pf)
-                        vals = None
-                        if isinstance(loaded, list):
-                            vals = loaded
-                        elif isinstance(loaded, dict) and 'values' in loaded:
-                            vals = loaded.get('values')
-                        if vals and len(vals) >= 8:
-                            vals = [int(x) for x in vals[:8]]
-                            friendliness_var.set(vals[0])
-                            professionalism_var.set(vals[1])
-                            profanity_var.set(vals[2])
-                            age_var.set(vals[3])
-                            friendliness_var.set(vals[4])
-                            humor_var.set(vals[5])
-                            sarcasm_var.set(vals[6])
-                            introversion_var.set(vals[7])
+                            vals = _preset_values(_loads(pf.read()))
+                        if vals:
+                            _apply_preset_values(vals)
                             applied = True
                 except Exception:
                     applied = False
                 # If last_selected was 'Custom' or not found, revert to DEFAULT_PRESETS['Default AI']
                 if not last_selected or not applied:
-                    vals = DEFAULT_PRESETS.get('Default AI')
-                    friendliness_var.set(vals[0])
-                    professionalism_var.set(vals[1])
-                    professionalism_var.set(vals[2])
-                    age_var.set(vals[3])
-                    gender_var.set(vals[4])
-                    humor_var.set(vals[5])
-                    sarcasm_var.set(vals[6])
-                    introversion_var.set(vals[7])
+                    _apply_preset_values(DEFAULT_PRESETS['Default AI'])
                 # If a saved preset was applied, the UI will be refreshed later after
                 # summary/title helper functions are defined
                 # Avoid calling them here to prevent editor/static-analysis 'not defined' warnings
     except Exception:
         pass
 
+    # Saved credentials from settings.json
+    saved_key = _loaded_settings.get('openai_api_key') or None
+    saved_ep = _loaded_settings.get('server_endpoint') or None
+    OPENAI_API_KEY = saved_key  # set global variable for immediate use
+    SERVER_ENDPOINT = saved_ep  # set global variable for immediate use
+
     # After loading persisted settings above, prompt for missing credentials
-    # based on the effective mode (local vs server), then load history
-    try:
+    # based on the effective mode (local vs server). This runs from the event loop
+    # so the main window is painted before any dialog blocks on it
+    def _prompt_missing_credentials():
         try:
-            # Determine saved credentials and any metadata about deletions
-            loaded_meta = load_settings() or {}
-            saved_key = get_saved_api_key()
-            saved_ep = get_saved_endpoint()
-
-            OPENAI_API_KEY = saved_key  # set global variable for immediate use
-            SERVER_ENDPOINT = saved_ep  # set global variable for immediate use
+            # Metadata about deletions
+            loaded_meta = _loaded_settings
 
             # If both are missing, prefer prompting for whichever was deleted
             # most recently according to settings.json metadata
@@ -299,13 +429,10 @@ def build_main_window():
                         prompt_for_api_key()
                     except Exception:
                         # If that unexpectedly fails, fall back to endpoint prompt
-                        try:
-                            prompt_for_endpoint()
-                        except Exception:
-                            pass
+                        _safe(prompt_for_endpoint)
             else:
                 # If only one is missing, prompt for that one depending on mode
-                if 'use_local_var' in globals() and use_local_var.get():
+                if use_local_var.get():
                     if not saved_key:
                         prompt_for_api_key()
                 else:
@@ -313,132 +440,165 @@ def build_main_window():
                         prompt_for_endpoint()
         except Exception:
             pass
-    except Exception:
-        pass
-    
-    # Load history after any credential dialogs so render_history can include
-    # any startup state that the user may have configured in the dialogs
-    try:
-        load_history()
-    except Exception:
-        pass
-    # Now that update_summary is defined, refresh the summary_label to match startup-applied preset
-    try:
-        update_summary()
-    except Exception:
-        pass
+        # Offer to load a conversation only once the credential dialogs are done
+        _safe(root.after, 200, prompt_load_on_startup)
 
     # On startup, show the last-selected preset in the conversation title (if available)
+    def _apply_startup_preset():
+        if last_selected:
+            _safe(set_conversation_title, None, last_selected)
+
+    # Rendering history, the summary and the title are queued as idle tasks (in
+    # this order) so the window can paint first. The summary is refreshed directly
+    # rather than debounced so the startup title set after it is not overwritten.
+    root.after_idle(load_history)
+    root.after_idle(_update_summary_now)
+    root.after_idle(_apply_startup_preset)
+
+    # Credential prompts (then the load prompt) after those, once the window is up
+    root.after_idle(_prompt_missing_credentials)
+
+
+def _pref_entry(item, now: int):
+    # Normalize one preferences.json list item to {'line', 'ts'}
+    if isinstance(item, dict) and 'line' in item:
+        try:
+            ts = int(item.get('ts')) if item.get('ts') is not None else now
+        except Exception:
+            ts = now
+        return {'line': str(item.get('line') or ''), 'ts': ts}
+    # older formats where each list item is a string
+    return {'line': str(item), 'ts': now}
+
+
+def _read_prefs():
+    # (stripped file text, parsed entries) for preferences.json, the file is only
+    # re-read when its mtime changes (save_prefs_list keeps the mirror current)
+    global _prefs_cache, _prefs_mtime
     try:
-        presets_path = os.path.join(os.path.dirname(__file__), 'presets.json')
-        if os.path.exists(presets_path):
-            try:
-                with open(presets_path, 'r', encoding='utf-8') as pf:
-                    loaded = json.load(pf)
-                last_sel = loaded.get('last_selected') if isinstance(loaded, dict) else None
-            except Exception:
-                last_sel = None
-        if last_sel:
-            try:
-                set_conversation_title(None, last_sel)
-            except Exception:
-                pass
+        mtime = os.stat(PREFS_PATH).st_mtime_ns
     except Exception:
-        pass
-
-    # Schedule prompt shortly after mainloop starts so dialogs are shown properly
+        # No preferences file yet
+        return '', []
+    if _prefs_cache is not None and _prefs_mtime == mtime:
+        return _prefs_cache
     try:
-        root.after(200, prompt_load_on_startup)
+        with open(PREFS_PATH, 'r', encoding='utf-8') as pf:
+            text = pf.read().strip()
     except Exception:
-        pass
+        return '', []
+    _prefs_cache = (text, _parse_prefs(text) if text else [])
+    _prefs_mtime = mtime
+    return _prefs_cache
+
+
+def _pref_key(line: str) -> str:
+    # Canonical key of a preference line: the part before ' is ', case-folded
+    low = line.casefold()
+    i = low.find(' is ')
+    return low[:i].strip() if i != -1 else low
 
 
-def load_prefs_list():
+def _parse_prefs(raw):
+    # Parse preferences.json contents (str or bytes) into [{'line', 'ts'}, ...]
     try:
-        if not os.path.exists(PREFS_PATH):
-            # No preferences file yet, return empty list
-            return []
-        with open(PREFS_PATH, 'r', encoding='utf-8') as pf:
-            loaded = json.load(pf)
-        out = []
+        loaded = _loads(raw)
+        # Entries without a usable timestamp all share one "now"
+        now = int(time.time())
         if isinstance(loaded, list):
-            for item in loaded:
-                if isinstance(item, dict) and 'line' in item:
-                    try:
-                        ts = int(item.get('ts')) if item.get('ts') is not None else int(time.time())
-                    except Exception:
-                        ts = int(time.time())
-                    out.append({'line': str(item.get('line') or ''), 'ts': ts})
-                else:
-                    # older formats where each list item is a string
-                    out.append({'line': str(item), 'ts': int(time.time())})
-        elif isinstance(loaded, str):
-            for l in loaded.splitlines():
-                l = l.strip()
-                if l:
-                    out.append({'line': l, 'ts': int(time.time())})
-        return out
+            return [_pref_entry(item, now) for item in loaded]
+        if isinstance(loaded, str):
+            return [{'line': l.strip(), 'ts': now} for l in loaded.splitlines() if l.strip()]
+        return []
     except Exception:
         return []
 
 
+def _settings_view(loaded: dict):
+    # The normalized settings dict handed out by load_settings
+    return {
+        'use_local_ai': bool(loaded.get('use_local_ai', True)),
+        'openai_api_key': loaded.get('openai_api_key'),
+        'server_endpoint': loaded.get('server_endpoint'),
+        'last_credential_deleted': loaded.get('last_credential_deleted'),
+        'last_credential_deleted_ts': loaded.get('last_credential_deleted_ts'),
+        'ai_history_lines': loaded.get('ai_history_lines'),
+        'pref_memory_lines': loaded.get('pref_memory_lines'),
+        'ai_model': loaded.get('ai_model') or 'gpt-4o-mini'
+    }
+
+
+def _load_settings_raw():
+    # Full settings.json dict, re-read only when the file's mtime changes
+    # (callers hold _settings_lock, the network thread reads settings too)
+    global _settings_cache, _settings_raw, _settings_mtime
+    # A single stat tells us whether the cached copy is still current
+    mtime = os.stat(SETTINGS_PATH).st_mtime_ns
+    if _settings_raw is not None and _settings_mtime == mtime:
+        return _settings_raw
+    with open(SETTINGS_PATH, 'r', encoding='utf-8') as sf:
+        loaded = _loads(sf.read())
+    if not isinstance(loaded, dict):
+        loaded = {}
+    _settings_raw = loaded
+    _settings_cache = _settings_view(loaded)
+    _settings_mtime = mtime
+    return _settings_raw
+
+
 def load_settings():
     try:
-        if os.path.exists(SETTINGS_PATH):
-            with open(SETTINGS_PATH, 'r', encoding='utf-8') as sf:
-                loaded = json.load(sf)
-            return {
-                'use_local_ai': bool(loaded.get('use_local_ai', True)),
-                'openai_api_key': loaded.get('openai_api_key'),
-                'server_endpoint': loaded.get('server_endpoint'),
-                'last_credential_deleted': loaded.get('last_credential_deleted'),
-                'last_credential_deleted_ts': loaded.get('last_credential_deleted_ts'),
-                'ai_history_lines': loaded.get('ai_history_lines'),
-                'pref_memory_lines': loaded.get('pref_memory_lines'),
-                'ai_model': loaded.get('ai_model') or 'gpt-4o-mini'
-            }
+        with _settings_lock:
+            _load_settings_raw()
+            return _settings_cache
     except Exception:
         pass
     return {'use_local_ai': True, 'openai_api_key': None, 'server_endpoint': None, 'last_credential_deleted': None, 'ai_history_lines': None, 'pref_memory_lines': None, 'ai_model': 'gpt-4o-mini'}
 
 
 def get_saved_api_key():
-    try:
-        loaded = load_settings()
-        if isinstance(loaded, dict):
-            key = loaded.get('openai_api_key')
-            if key:
-                return key
-    except Exception:
-        pass
-    return None
+    return load_settings().get('openai_api_key') or None
 
 
 def get_saved_endpoint():
-    try:
-        loaded = load_settings()
-        if isinstance(loaded, dict):
-            ep = loaded.get('server_endpoint')
-            if ep:
-                return ep
-    except Exception:
-        pass
-    return None
+    return load_settings().get('server_endpoint') or None
 
 
 def get_saved_ai_model():
-    try:
-        loaded = load_settings()
-        if isinstance(loaded, dict):
-            model = loaded.get('ai_model')
-            if model:
-                return model
-    except Exception:
-        pass
-    return 'gpt-4o-mini'
+    return load_settings().get('ai_model') or 'gpt-4o-mini'
+
+
+def _personality_vars():
+    # Personality slider variables in preset tuple order
+    return (friendliness_var, professionalism_var, profanity_var, age_var,
+            gender_var, humor_var, sarcasm_var, introversion_var)
+
+
+def _apply_preset_values(vals):
+    # Set all eight personality variables from a preset tuple/list (callers refresh the summary)
+    # Values are converted up front so a bad entry leaves the sliders untouched
+    ints = [int(x) for x in vals[:8]]
+    for var, val in zip(_personality_vars(), ints):
+        var.set(val)
+
+
+def _pick(table: tuple, value: int):
+    # Index a wording table by slider value, out-of-range values (e.g. from a
+    # hand-edited preset file) fall back to the first entry like the old else branches
+    return table[value] if 0 <= value < len(table) else table[0]
 
 
 def update_summary(*args):
+    # Coalesce bursts of slider changes into one refresh 50ms after the last one
+    global _summary_after_id
+    if _summary_after_id is not None:
+        _safe(root.after_cancel, _summary_after_id)
+    _summary_after_id = root.after(50, _update_summary_now)
+
+
+def _update_summary_now():
+    global _summary_after_id, _last_summary_text
+    _summary_after_id = None
 
     f = friendliness_var.get()
     p = professionalism_var.get()
@@ -448,76 +608,32 @@ def update_summary(*args):
     h = humor_var.get()
     s = sarcasm_var.get()
     i = introversion_var.get()
-    tone = []
-
-    # Friendliness (0-3)
-    if f == 3:
-        tone.append('very friendly')
-    elif f == 2:
-        tone.append('friendly')
-    elif f == 1:
-        tone.append('somewhat reserved')
-    else:
-        tone.append('reserved')
 
-    # Professionalism (0-2)
-    if p == 2:
-        tone.append('professional')
-    elif p == 1:
-        tone.append('somewhat professional')
-    else:
-        tone.append('casual')
-
-    # Profanity (0-2)
-    if r == 2:
-        tone.append('coarse language')
-    elif r == 1:
-        tone.append('somewhat coarse language')
-    else:
-        tone.append('clean language')
-    
-    # Age (5-127)
-    tone.append(f'age {a}')
-
-    # Gender (0-2)
-    if g == 2:
-        tone.append('feminine')
-    elif g == 1:
-        tone.append('gender neutral')
-    else:
-        tone.append('masculine')
-
-    # Humor (0-2)
-    if h == 2:
-        tone.append('strong humour')
-    elif h == 1:
-        tone.append('mild humour')
-    else:
-        tone.append('no humour')
-
-    # Sarcasm (0-2)
-    if s == 2:
-        tone.append('strong sarcasm')
-    elif s == 1:
-        tone.append('mild sarcasm')
-    else:
-        tone.append('no sarcasm')
-
-    # Extroversion (0-2)
-    if i == 2:
-        tone.append('extroverted')
-    elif i == 1:
-        tone.append('neutral extroversion')
-    else:
-        tone.append('introverted')
+    # Friendliness (0-3), professionalism, profanity, age (5-127), gender,
+    # humour, sarcasm and extroversion (all 0-2)
+    tone = [
+        _pick(FRIENDLINESS_TONES, f), _pick(PROFESSIONALISM_TONES, p), _pick(PROFANITY_TONES, r),
+        f'age {a}', _pick(GENDER_TONES, g), _pick(HUMOUR_TONES, h), _pick(SARCASM_TONES, s),
+        _pick(EXTROVERSION_TONES, i),
+    ]
 
-    summary_label.config(text='Summary: ' + ', '.join(tone) + f' ')
+    text = f"Summary: {', '.join(tone)} "
+    if _last_summary_text != text:
+        summary_label.config(text=text)
+        _last_summary_text = text
+    # Mirror into the personality window summary while it is open
+    win_summary = getattr(open_personality_window, 'win_summary', None)
+    if win_summary is not None:
+        try:
+            win_summary.config(text=text)
+        except tk.TclError:
+            open_personality_window.win_summary = None
 
     # After updating summary, also refresh conversation title to show active preset
     try:
         # preserve current conversation filename if any
         try:
-            cur = os.path.basename(current_conversation_path) if current_conversation_path else None
+            cur = os.path.basename(STATE.current_conversation_path) if STATE.current_conversation_path else None
         except Exception:
             cur = None
         set_conversation_title(cur)
@@ -525,6 +641,33 @@ def update_summary(*args):
         pass
 
 
+def build_personality_instructions():
+    # Personality instructions built from sliders (appended as another system message),
+    # cached per slider combination since the sliders rarely change between sends
+    key = tuple(int(v.get()) for v in _personality_vars())
+    cached = _PERSONALITY_CACHE.get(key)
+    if cached is not None:
+        return cached
+    f, p, r, a, g, h, s, i = key
+    parts = [
+        # Friendliness (0-3) and professionalism (0-2)
+        _pick(FRIENDLINESS_PHRASES, f), _pick(PROFESSIONALISM_PHRASES, p),
+        # Profanity (0-2), but enforce age constraint, young voices should not use profanity
+        YOUTH_PROFANITY_PHRASE if a <= 15 else _pick(PROFANITY_PHRASES, r),
+        # Age (5-127)
+        f'Adopt the voice of someone aged {a}.',
+        # Gender (0-2), anything unexpected falls back to neutral wording
+        GENDER_PHRASES[g] if 0 <= g < len(GENDER_PHRASES) else GENDER_PHRASES[1],
+        # Humour and sarcasm (0-2)
+        _pick(HUMOUR_PHRASES, h), _pick(SARCASM_PHRASES, s),
+        # Extroversion (0-2)
+        _pick(EXTROVERSION_PHRASES, i),
+    ]
+    text = ' '.join(parts)
+    _PERSONALITY_CACHE[key] = text
+    return text
+
+
 def set_conversation_title(name: str, preset_override: str = None):
     # If the name looks like a filename, strip the .json extension for display
     # Use preset_override if provided, otherwise compute active preset
@@ -542,10 +685,108 @@ def set_conversation_title(name: str, preset_override: str = None):
     else:
         display = 'New Conversation'
 
-    if preset_label:
-        conv_title.config(text=f"{display} (with {preset_label})")
-    else:
-        conv_title.config(text=display)
+    text = f"{display} (with {preset_label})" if preset_label else display
+    # Reconfiguring the label relayouts the window, so skip it when nothing changed
+    if conv_title.cget('text') != text:
+        conv_title.config(text=text)
+
+
+def _preset_values(loaded):
+    # Slider values tuple from a parsed preset file (a list of values or an object
+    # with 'values'), None if it doesn't hold a usable preset
+    vals = None
+    if isinstance(loaded, list):
+        vals = loaded
+    elif isinstance(loaded, dict) and 'values' in loaded:
+        vals = loaded.get('values')
+    if vals and len(vals) >= 8:
+        return tuple(int(x) for x in vals[:8])
+    return None
+
+
+def _load_disk_presets():
+    # name -> values for personalities/*.json. The directory is only rescanned when
+    # its mtime changes, and then only files whose own mtime changed are re-parsed
+    global _disk_presets, _disk_presets_mtime, _disk_preset_files
+    try:
+        dir_mtime = os.stat(PRESETS_DIR).st_mtime_ns
+    except Exception:
+        # No personalities/ yet, keep one empty result (with no mtime) so the preset
+        # index built from it stays valid until the directory is created
+        if _disk_presets is None or _disk_presets_mtime is not None:
+            _disk_presets = {}
+            _disk_presets_mtime = None
+            _disk_preset_files = {}
+        return _disk_presets
+    if _disk_presets is not None and _disk_presets_mtime == dir_mtime:
+        return _disk_presets
+
+    presets = {}
+    files = {}
+    try:
+        # scandir entries already carry the full path and file type
+        with os.scandir(PRESETS_DIR) as it:
+            for e in it:
+                if not e.name.lower().endswith('.json'):
+                    continue
+                try:
+                    if not e.is_file(follow_symlinks=False):
+                        continue
+                    mtime = e.stat().st_mtime_ns
+                    cached = _disk_preset_files.get(e.name)
+                    if cached is not None and cached[0] == mtime:
+                        vals = cached[1]
+                    else:
+                        with open(e.path, 'rb') as pf:
+                            vals = _preset_values(_loads(pf.read()))
+                    files[e.name] = (mtime, vals)
+                    if vals is not None:
+                        presets[os.path.splitext(e.name)[0]] = vals
+                except Exception:
+                    continue
+    except Exception:
+        pass
+    _disk_presets = presets
+    _disk_presets_mtime = dir_mtime
+    _disk_preset_files = files
+    return presets
+
+
+def _load_presets_json():
+    # Parsed presets.json (saved presets and last_selected), re-read only when it changes
+    global _presets_json, _presets_json_mtime
+    try:
+        mtime = os.stat(PRESETS_PATH).st_mtime_ns
+    except Exception:
+        return {}
+    if _presets_json is None or _presets_json_mtime != mtime:
+        try:
+            with open(PRESETS_PATH, 'rb') as pf:
+                loaded = _loads(pf.read())
+        except Exception:
+            return {}
+        _presets_json = loaded if isinstance(loaded, dict) else {}
+        _presets_json_mtime = mtime
+    return _presets_json
+
+
+def _get_preset_index():
+    # Rebuild the values -> name index only when the disk presets were rescanned
+    # (a rescan produces a new dict, so identity tells us when to rebuild)
+    global _preset_index, _preset_index_source
+    disk = _load_disk_presets()
+    if _preset_index is not None and _preset_index_source is disk:
+        return _preset_index
+
+    # Built-ins are added first so they win over saved presets with the same values
+    index = {}
+    for name, vals in DEFAULT_PRESETS.items():
+        index.setdefault(tuple(vals), name)
+    for name, vals in disk.items():
+        index.setdefault(vals, name)
+    _preset_index = index
+    _preset_index_source = disk
+    return index
 
 
 def determine_active_preset_name():
@@ -554,32 +795,7 @@ def determine_active_preset_name():
         int(friendliness_var.get()), int(professionalism_var.get()), int(profanity_var.get()),
         int(age_var.get()), int(gender_var.get()), int(humor_var.get()), int(sarcasm_var.get()), int(introversion_var.get())
     )
-    # Check built-ins first
-    for name, vals in DEFAULT_PRESETS.items():
-        if tuple(vals) == tpl:
-            return name
-    # Check personalities dir for saved presets
-    try:
-        presets_dir = os.path.join(os.path.dirname(__file__), 'personalities')
-        for fname in os.listdir(presets_dir):
-            if not fname.lower().endswith('.json'):
-                continue
-            full = os.path.join(presets_dir, fname)
-            try:
-                with open(full, 'r', encoding='utf-8') as pf:
-                    loaded = json.load(pf)
-                vals = None
-                if isinstance(loaded, list):
-                    vals = loaded
-                elif isinstance(loaded, dict) and 'values' in loaded:
-                    vals = loaded.get('values')
-                if vals and len(vals) >= 8 and tuple(int(x) for x in vals[:8]) == tpl:
-                    return os.path.splitext(fname)[0]
-            except Exception:
-                continue
-    except Exception:
-        pass
-    return 'Custom'
+    return _get_preset_index().get(tpl, 'Custom')
 
 
 def prompt_for_api_key():
@@ -593,10 +809,7 @@ def prompt_for_api_key():
         # No saved key - force a centered, modal, non-closable dialog
         dlg = tk.Toplevel(root)
         dlg.title('OpenAI API Key Required')
-        try:
-            dlg.transient(root)
-        except Exception:
-            pass
+        _safe(dlg.transient, root)
         dlg.resizable(False, False)
 
         # Disable window close and Escape key so the dialog cannot be dismissed
@@ -617,18 +830,9 @@ def prompt_for_api_key():
         def switch_to_server():
             try:
                 # persist toggle to server mode
-                try:
-                    save_settings(False)
-                except Exception:
-                    pass
-                try:
-                    use_local_var.set(False)
-                except Exception:
-                    pass
-                try:
-                    dlg.destroy()
-                except Exception:
-                    pass
+                _safe(save_settings, False)
+                _safe(use_local_var.set, False)
+                _safe(dlg.destroy)
                 # If no server endpoint exists, prompt for it now
                 try:
                     if not get_saved_endpoint():
@@ -641,25 +845,16 @@ def prompt_for_api_key():
 
         def on_change(*_):
             val = key_var.get().strip()
-            try:
-                save_btn.config(state=tk.NORMAL if val else tk.DISABLED)
-            except Exception:
-                pass
+            _safe(save_btn.config, state=tk.NORMAL if val else tk.DISABLED)
 
         def on_save():
             val = key_var.get().strip()
             if not val:
                 return
             # Persist key into settings.json
-            try:
-                save_settings(True, api_key=val)
-            except Exception:
-                pass
+            _safe(save_settings, True, api_key=val)
             OPENAI_API_KEY = val
-            try:
-                dlg.destroy()
-            except Exception:
-                pass
+            _safe(dlg.destroy)
 
         save_btn.config(command=on_save)
         key_var.trace_add('write', on_change)
@@ -672,10 +867,7 @@ def prompt_for_api_key():
         sh = root.winfo_screenheight()
         x = max(0, (sw - ww) // 2)
         y = max(0, (sh - wh) // 2)
-        try:
-            dlg.geometry(f'+{x}+{y}')
-        except Exception:
-            pass
+        _safe(dlg.geometry, f'+{x}+{y}')
 
         # Make modal and block until a key is saved
         try:
@@ -683,10 +875,7 @@ def prompt_for_api_key():
             entry.focus_force()
             root.wait_window(dlg)
         except Exception:
-            try:
-                root.wait_window(dlg)
-            except Exception:
-                pass
+            _safe(root.wait_window, dlg)
     except Exception:
         OPENAI_API_KEY = get_saved_api_key()
 
@@ -701,10 +890,7 @@ def prompt_for_endpoint():
 
         dlg = tk.Toplevel(root)
         dlg.title('Server Endpoint Required')
-        try:
-            dlg.transient(root)
-        except Exception:
-            pass
+        _safe(dlg.transient, root)
         dlg.resizable(False, False)
         dlg.protocol('WM_DELETE_WINDOW', lambda: None)
         dlg.bind('<Escape>', lambda: None)
@@ -721,18 +907,9 @@ def prompt_for_endpoint():
         # Allow the user to switch to local-mode prompt instead
         def switch_to_local():
             try:
-                try:
-                    save_settings(True)
-                except Exception:
-                    pass
-                try:
-                    use_local_var.set(True)
-                except Exception:
-                    pass
-                try:
-                    dlg.destroy()
-                except Exception:
-                    pass
+                _safe(save_settings, True)
+                _safe(use_local_var.set, True)
+                _safe(dlg.destroy)
                 # If no API key exists, prompt for it now
                 try:
                     if not get_saved_api_key():
@@ -745,28 +922,15 @@ def prompt_for_endpoint():
 
         def on_change(*_):
             val = ep_var.get().strip()
-            try:
-                save_btn.config(state=tk.NORMAL if val else tk.DISABLED)
-            except Exception:
-                pass
+            _safe(save_btn.config, state=tk.NORMAL if val else tk.DISABLED)
 
         def on_save():
             val = ep_var.get().strip()
             if not val:
                 return
-            try:
-                # Persist endpoint into settings.json
-                save_settings(False, endpoint=val)
-            except Exception:
-                pass
-            try:
-                endpoint = val
-            except Exception:
-                pass
-            try:
-                dlg.destroy()
-            except Exception:
-                pass
+            # Persist endpoint into settings.json
+            _safe(save_settings, False, endpoint=val)
+            _safe(dlg.destroy)
 
         save_btn.config(command=on_save)
         ep_var.trace_add('write', on_change)
@@ -778,44 +942,137 @@ def prompt_for_endpoint():
         sh = root.winfo_screenheight()
         x = max(0, (sw - ww) // 2)
         y = max(0, (sh - wh) // 2)
-        try:
-            dlg.geometry(f'+{x}+{y}')
-        except Exception:
-            pass
+        _safe(dlg.geometry, f'+{x}+{y}')
 
         try:
             dlg.grab_set()
             entry.focus_force()
             root.wait_window(dlg)
         except Exception:
-            try:
-                root.wait_window(dlg)
-            except Exception:
-                pass
+            _safe(root.wait_window, dlg)
     except Exception:
         # fallback - leave global endpoint as-is
+        pass
+
+
+# User Interaction Functions (run on user actions)
+
+def _set_send_enabled(enabled: bool):
+    # Enable/disable the send button, message entry and timestamp toggle together.
+    # Module level, so 'entry' is always the Entry widget and never a local
+    # preference entry from send_message's worker
+    state = tk.NORMAL if enabled else tk.DISABLED
+    for w in (send_btn, entry, show_ts_cb):
+        _safe(w.config, state=state)
+
+
+async def extract_and_merge_prefs(message: str, user_msgs: list):
+    # Ask the model for new/updated preference lines from the user's recent messages
+    # and merge them into preferences.json (runs on the network loop after the reply is shown)
+    try:
+        prefs_text, existing_prefs_list = _read_prefs()
+
+        # Build a prompt to extract concise preference lines, from the user's messages only
+        gen_msgs = [
+            {"role": "system", "content": (
+                "Extract concise user preference statements from the conversation. "
+                "Important: consider ONLY the user's messages; ignore all assistant/AI utterances. "
+                "Output plain text only, one canonical statement per line, using this exact pattern: The user's <property> is <value>. "
+                "Examples: The user's favourite colour is purple; The user's name is Colin. "
+                "Do NOT include numbering, explanations, or extra commentary. Compare with the existing preferences below and output ONLY NEW or UPDATED preference lines (one per line). If there are none, output nothing."
+            )},
+        ]
+
+        # Include existing preferences (migrate/load JSON) as context
         try:
-            endpoint = endpoint
+            if existing_prefs_list:
+                existing_text = '\n'.join([p.get('line','') for p in existing_prefs_list])
+                gen_msgs.append({"role": "system", "content": f"Existing preferences:\n{existing_text}"})
         except Exception:
-            pass
+            # Fallback to legacy text if something goes wrong
+            try:
+                if prefs_text:
+                    gen_msgs.append({"role": "system", "content": f"Existing preferences:\n{prefs_text}"})
+            except Exception:
+                pass
 
+        # Provide the user's messages since the last extraction as context (limit to the last 8)
+        for um in user_msgs[-8:]:
+            gen_msgs.append({"role": "user", "content": um})
+
+        # Also include the current user message explicitly
+        gen_msgs.append({"role": "user", "content": message})
+
+        # Try to get extracted preferences from the server
+        try:
+            # Route preference-extraction through local or server API depending on settings
+            if use_local_var.get():
+                gen_text = await call_local_openai(gen_msgs)
+            else:
+                gen_text = await call_server_api(gen_msgs)
+            extracted = gen_text.strip() if isinstance(gen_text, str) else ''
+        except Exception as e:
+            extracted = ''
+
+        if extracted:
+            # New extracted preference lines
+            new_lines = [l.strip() for l in extracted.splitlines() if l.strip()]
+            existing = existing_prefs_list
+
+            # Build ordered key list and dict keyed by canonical pref key
+            keys = []
+            mapping = {}
+            for item in existing:
+                ln = item.get('line','').strip()
+                if not ln:
+                    continue
+                k = _pref_key(ln)
+                if k in mapping:
+                    # skip duplicates in file, keep first occurrence
+                    continue
+                mapping[k] = {'line': ln, 'ts': int(item.get('ts') or int(time.time()))}
+                keys.append(k)
+
+            # Apply new/updated lines: move updated keys to newest position
+            for nl in new_lines:
+                k = _pref_key(nl)
+                new_entry = {'line': nl, 'ts': int(time.time())}
+                if k in mapping:
+                    # remove existing key from keys order then re-append (now newest)
+                    _safe(keys.remove, k)
+                mapping[k] = new_entry
+                keys.append(k)
+
+            # Rebuild final ordered list oldest to newest
+            final = [mapping[k] for k in keys]
+
+            # Enforce preference entry limit (drop oldest when over limit)
+            try:
+                limit = STATE.prefs_limit
+                if isinstance(limit, int) and limit >= 0:
+                    while len(final) > int(limit):
+                        final.pop(0)
+            except Exception:
+                pass
+
+            # Persist as JSON list of {line, ts}
+            _safe(save_prefs_list, final)
+    except Exception:
+        # If anything in prefs extraction fails, the next extraction simply tries again
+        pass
 
-# User Interaction Functions (run on user actions)
 
 def send_message():
     message = entry.get()
     if not message.strip():
         return
 
-    # Add to history (keep last 10 messages), each entry is (role, message, iso_timestamp)
-    ts = time.strftime('%Y-%m-%d %H:%M:%S')
-    history.append(("You", message, ts))
+    # Add to history (limited to history_limit entries), each entry is
+    # (role, message, ts) with ts in epoch seconds
+    ts = int(time.time())
+    STATE.history.append(("You", message, ts))
     # Also append to the untrimmed full_history for persistence
-    full_history.append(("You", message, ts))
-    try:
-        _trim_history()
-    except Exception:
-        pass
+    STATE.full_history.append("You", message, ts)
 
     # Determine the active preset label (use in UI instead of generic 'AI')
     try:
@@ -830,126 +1087,49 @@ def send_message():
         f"Your name is {preset_label} and you are a user's chat partner. As such, you should keep responses concise, try to adapt them based on the context of the conversation, and for the most part the user's preferences or tone depending on your personality defined below."
     )}]
 
-    # Personality instructions built from sliders (appended as another system message)
-    def build_personality_instructions():
-        parts = []
-        # core sliders
-        f = friendliness_var.get()
-        p = professionalism_var.get()
-        r = profanity_var.get()
-        a = age_var.get()
-        g = gender_var.get()
-        h = humor_var.get()
-        s = sarcasm_var.get()
-        i = introversion_var.get()
-
-        # Friendliness (0-3)
-        if f == 3:
-            parts.append('Be very friendly, kind and warm.')
-        elif f == 2:
-            parts.append('Be friendly and kind.')
-        elif f == 1:
-            parts.append('Be slightly reserved.')
-        else:
-            parts.append('Be very reserved and blunt.')
-
-        # Professionalism (0-2)
-        if p == 2:
-            parts.append('Maintain a professional tone.')
-        elif p == 1:
-            parts.append('Be somewhat professional.')
-        else:
-            parts.append('Use casual wording.')
-
-        # Profanity (0-2), but enforce age constraint, young voices should not use profanity
-        if a <= 15:
-            # force no profanity for young ages regardless of setting
-            parts.append('Do not use profanity under any circumstances; avoid coarse language due to youthful voice.')
-        else:
-            if r == 2:
-                parts.append('Profanity allowed: high (use strong coarse language as much as possible if it makes sense).')
-            elif r == 1:
-                parts.append('Profanity allowed: moderate (may use mild swear words).')
-            else:
-                parts.append('No profanity; use clean language.')
-
-        # Age (5-127)
-        parts.append(f'Adopt the voice of someone aged {a}.')
-
-        # Gender (0-2)
-        if g == 2:
-            parts.append('Use a feminine voice/wording.')
-        elif g == 0:
-            parts.append('Use a masculine voice/wording.')
-        else:
-            parts.append('Use neutral wording.')
-
-        # Humor (0-2)
-        if h == 2:
-            parts.append('Try and be comedic as much as possible where appropriate.')
-        elif h == 1:
-            parts.append('Use some humour occasionally.')
-        else:
-            parts.append('Avoid humour; be straightforward.')
-
-        # Sarcasm (0-2)
-        if s == 2:
-            parts.append('Sarcasm permitted: use sharp, ironic remarks as much as possible if fitting.')
-        elif s == 1:
-            parts.append('Sarcasm permitted: mild irony allowed.')
-        else:
-            parts.append('Do not use sarcasm; be literal and sincere.')
-
-        # Extroversion (0-2)
-            if i == 2:
-                parts.append('Favor social/outgoing hobbies and confident wording. Be excitable and enthusiastic where appropriate, expressing with exclamation marks more often than not.')
-            elif i == 1:
-                parts.append('No particular bias toward extroversion or introversion.')
-            else:
-                parts.append("Favor solitary/quiet hobbies and mention mild nervousness or reserve in social situations when relevant. Do not be excitable, for instance lay off of exclamation marks unless absolutely necessary.")
-
-        return ' '.join(parts)
-
     personality_instruction = build_personality_instructions()
     if personality_instruction:
         messages_for_gpt.append({"role": "system", "content": personality_instruction})
 
     # Preferences are loaded from `preferences.json` later in the worker and
     # inserted as a system message alongside personality instructions
-    # Add each entry under short term history to the payload
-    for entry_item in history:
-        if len(entry_item) >= 2:
-            role = entry_item[0]
-            msg = entry_item[1]
-            messages_for_gpt.append({"role": "user" if role == "You" else "assistant", "content": msg})
+    # Add each entry under short term history to the payload (built by
+    # comprehension from one snapshot of the deque)
+    recent = [e for e in list(STATE.history) if len(e) >= 2]
+    messages_for_gpt.extend([
+        {"role": "user" if e[0] == "You" else "assistant", "content": e[1]}
+        for e in recent
+    ])
 
     # Ensure the current user message is present in the payload even when
     # the in-memory short-term history limit is set to 0 (which would
     # otherwise remove recently-appended items)
-    # Avoid duplicating if it's already present
+    # Avoid duplicating if it's already present (it can only be the last entry,
+    # since it was the last thing appended to history)
     try:
-        if not any(m.get('role') == 'user' and m.get('content') == message for m in messages_for_gpt):
+        last = messages_for_gpt[-1]
+        if last.get('role') != 'user' or last.get('content') != message:
             messages_for_gpt.append({"role": "user", "content": message})
     except Exception:
-        try:
-            messages_for_gpt.append({"role": "user", "content": message})
-        except Exception:
-            pass
+        _safe(messages_for_gpt.append, {"role": "user", "content": message})
 
     # Add user message to chat UI immediately (include timestamp if enabled) and insert AI placeholder
     try:
-        # Insert the user's message immediately with colored label
-        insert_labeled_message('You', message, ts)
+        # Append only the user's new entry, earlier lines are left untouched
+        append_history_entry()
     except Exception:
         try:
             if show_timestamps_var.get():
-                append_chat(f"You [{ts}]: {message}\n\n")
+                append_chat(f"You [{_fmt_ts(ts)}]: {message}\n\n")
             else:
                 append_chat(f"You: {message}\n\n")
         except Exception:
-            append_chat(f"You [{ts}]: {message}\n\n")
+            append_chat(f"You [{_fmt_ts(ts)}]: {message}\n\n")
     try:
-        # Insert assistant placeholder with colored preset label (no colon)
+        # Insert assistant placeholder with colored preset label (no colon), marking
+        # where it starts so the reply can replace it in place
+        chat_area.mark_set('ai_placeholder', 'end-1c')
+        chat_area.mark_gravity('ai_placeholder', tk.LEFT)
         insert_labeled_message(preset_label, 'is thinking...', prefix_colon=False)
     except Exception:
         append_chat(f"{preset_label} is thinking...\n\n")
@@ -957,18 +1137,17 @@ def send_message():
     chat_area.see(tk.END)
 
     # Disable send controls while awaiting a reply
-    send_btn.config(state=tk.DISABLED)
-    entry.config(state=tk.DISABLED)
-    try:
-        show_ts_cb.config(state=tk.DISABLED)
-    except Exception:
-        pass
+    _set_send_enabled(False)
     # Mark as having unsaved changes (a new outgoing message)
-    try:
-        global unsaved_changes
-        unsaved_changes = True
-    except Exception:
-        pass
+    STATE.unsaved_changes = True
+
+    # Decide here (on the UI thread) whether this send also extracts preferences,
+    # the extractor gets every user message sent since it last ran
+    STATE.pending_prefs_msgs.append(message)
+    extract_prefs = len(STATE.pending_prefs_msgs) >= PREFS_EXTRACT_EVERY
+    if extract_prefs:
+        user_msgs = STATE.pending_prefs_msgs[:-1]
+        STATE.pending_prefs_msgs = []
 
     # Flag to track if response was received (for timeout handling)
     response_received = [False]
@@ -977,7 +1156,7 @@ def send_message():
         if not response_received[0]:
             # Determine timeout message based on current mode
             try:
-                is_local = use_local_var.get() if 'use_local_var' in globals() and isinstance(use_local_var, tk.BooleanVar) else True
+                is_local = use_local_var.get()
                 if is_local:
                     timeout_msg = "Request timed out. Please check your OpenAI API key and internet connection."
                 else:
@@ -986,290 +1165,156 @@ def send_message():
                 timeout_msg = "Request timed out. Please check your API key or server endpoint configuration."
 
             # Replace the placeholder with timeout error
-            ts = time.strftime('%Y-%m-%d %H:%M:%S')
-            history.append((preset_label, timeout_msg, ts))
-            full_history.append((preset_label, timeout_msg, ts))
-            try:
-                _trim_history()
-            except Exception:
-                pass
+            ts = int(time.time())
+            STATE.history.append((preset_label, timeout_msg, ts))
+            STATE.full_history.append(preset_label, timeout_msg, ts)
 
             # Re-enable controls
-            try:
-                send_btn.config(state=tk.NORMAL)
-            except Exception:
-                pass
-            try:
-                ent = globals().get('entry')
-                if ent is not None:
-                    ent.config(state=tk.NORMAL)
-            except Exception:
-                pass
-            try:
-                show_ts_cb.config(state=tk.NORMAL)
-            except Exception:
-                pass
+            _set_send_enabled(True)
 
-            # Re-render the chat area to show the timeout message
-            render_history()
+            # Show the timeout message in place of the placeholder
+            replace_placeholder()
 
     # Schedule timeout after 20 seconds
     timeout_id = root.after(20000, timeout_callback)
 
-    def worker(payload):
-        try:
-            # Attempt to extract new/updated preferences from recent conversation and merge into PREFS_PATH
-            try:
-                # Load current prefs (may be empty)
-                current_prefs = ''
-                if os.path.exists(PREFS_PATH):
-                    try:
-                        with open(PREFS_PATH, 'r', encoding='utf-8') as pf:
-                            current_prefs = pf.read().strip()
-                    except Exception:
-                        current_prefs = ''
-
-                # Build a prompt to extract concise preference lines, from the user's messages only
-                gen_msgs = [
-                    {"role": "system", "content": (
-                        "Extract concise user preference statements from the conversation. "
-                        "Important: consider ONLY the user's messages; ignore all assistant/AI utterances. "
-                        "Output plain text only, one canonical statement per line, using this exact pattern: The user's <property> is <value>. "
-                        "Examples: The user's favourite colour is purple; The user's name is Colin. "
-                        "Do NOT include numbering, explanations, or extra commentary. Compare with the existing preferences below and output ONLY NEW or UPDATED preference lines (one per line). If there are none, output nothing."
-                    )},
-                ]
-
-                # Include existing preferences (migrate/load JSON) as context
-                try:
-                    existing_prefs_list = load_prefs_list()
-                    if existing_prefs_list:
-                        prefs_text = '\n'.join([p.get('line','') for p in existing_prefs_list])
-                        gen_msgs.append({"role": "system", "content": "Existing preferences:\n" + prefs_text})
-                except Exception:
-                    # Fallback to legacy text if something goes wrong
-                    try:
-                        if current_prefs:
-                            gen_msgs.append({"role": "system", "content": "Existing preferences:\n" + current_prefs})
-                    except Exception:
-                        pass
-
-                # Provide recent user-only history as context (limit to last 8 user messages)
-                # history entries may be (role, msg, ts) so don't unpack incorrectly
-                user_msgs = [item[1] for item in history if isinstance(item, (list, tuple)) and len(item) >= 2 and item[0] == "You"]
-                for um in user_msgs[-8:]:
-                    gen_msgs.append({"role": "user", "content": um})
-
-                # Also include the current user message explicitly
-                gen_msgs.append({"role": "user", "content": message})
-
-                # Try to get extracted preferences from the server
-                try:
-                    # Route preference-extraction through local or server API depending on settings
-                    if 'use_local_var' in globals() and use_local_var.get():
-                        gen_text = call_local_openai(gen_msgs)
-                    else:
-                        gen_text = call_server_api(gen_msgs)
-                    extracted = gen_text.strip() if isinstance(gen_text, str) else ''
-                except Exception as e:
-                    extracted = ''
-
-                if extracted:
-                    # New extracted preference lines
-                    new_lines = [l.strip() for l in extracted.splitlines() if l.strip()]
-                    try:
-                        existing = load_prefs_list() or []
-                    except Exception:
-                        existing = []
-
-                    # Build ordered key list and dict keyed by canonical pref key
-                    def pref_key(line):
-                        low = line.lower()
-                        if ' is ' in low:
-                            return low.split(' is ', 1)[0].strip()
-                        return low
-
-                    keys = []
-                    mapping = {}
-                    for item in existing:
-                        ln = item.get('line','').strip()
-                        if not ln:
-                            continue
-                        k = pref_key(ln)
-                        if k in mapping:
-                            # skip duplicates in file, keep first occurrence
-                            continue
-                        mapping[k] = {'line': ln, 'ts': int(item.get('ts') or int(time.time()))}
-                        keys.append(k)
-
-                    # Apply new/updated lines: move updated keys to newest position
-                    for nl in new_lines:
-                        k = pref_key(nl)
-                        entry = {'line': nl, 'ts': int(time.time())}
-                        if k in mapping:
-                            # remove existing key from keys order then re-append (now newest)
-                            try:
-                                keys.remove(k)
-                            except Exception:
-                                pass
-                        mapping[k] = entry
-                        keys.append(k)
-
-                    # Rebuild final ordered list oldest to newest
-                    final = [mapping[k] for k in keys]
-
-                    # Enforce preference entry limit (drop oldest when over limit)
-                    try:
-                        limit = globals().get('PREFS_LIMIT', PREFS_DEFAULT_LINES)
-                        if isinstance(limit, int) and limit >= 0:
-                            while len(final) > int(limit):
-                                final.pop(0)
-                    except Exception:
-                        pass
+    # Streamed reply text replaces the placeholder as it arrives, the finished entry
+    # (with its timestamp) is put in its place by replace_placeholder once done
+    streaming = [False]
 
-                    # Persist as JSON list of {line, ts}
-                    try:
-                        save_prefs_list(final)
-                    except Exception:
-                        pass
-            except Exception:
-                # If anything in prefs extraction fails, continue without blocking the main request
-                pass
+    def show_delta(delta):
+        try:
+            # The placeholder is gone once a timeout message took its place
+            chat_area.index('ai_placeholder')
+        except tk.TclError:
+            return
+        follow = _chat_at_bottom()
+        chat_area.config(state=tk.NORMAL)
+        if not streaming[0]:
+            streaming[0] = True
+            # The reply has started arriving, so it is no longer at risk of timing out
+            _safe(root.after_cancel, timeout_id)
+            chat_area.delete('ai_placeholder', tk.END)
+            chat_area.insert(tk.END, preset_label, ('assistant_label',), ': ', ())
+        chat_area.insert(tk.END, delta)
+        if follow:
+            chat_area.see(tk.END)
+        chat_area.config(state=tk.DISABLED)
+
+    # Deltas arrive on the network loop, often a few characters at a time. They are
+    # buffered and flushed to the chat area at most every 30ms, one insert per flush
+    pending_deltas = []
+    pending_lock = threading.Lock()
+    flush_scheduled = [False]
+
+    def queue_delta(delta):
+        with pending_lock:
+            pending_deltas.append(delta)
+            if flush_scheduled[0]:
+                return
+            flush_scheduled[0] = True
+        root.after(30, flush_deltas)
+
+    def flush_deltas():
+        with pending_lock:
+            text = ''.join(pending_deltas)
+            pending_deltas.clear()
+            flush_scheduled[0] = False
+        if text:
+            show_delta(text)
+
+    async def worker(payload):
+        try:
+            # Preferences from the in-memory mirror (a stat, no read unless the file changed)
+            prefs_text = _read_prefs()[0]
 
-            # If preferences file exists now, insert its contents as a system message
+            # If there are preferences, insert them as a system message
             # before any chat history/user messages so preferences are treated as
             # system-level context alongside personality instructions.
             try:
-                if os.path.exists(PREFS_PATH):
-                    with open(PREFS_PATH, 'r', encoding='utf-8') as pf:
-                        prefs_text = pf.read().strip()
-                        if prefs_text:
-                            # Find the first index where role != 'system' and insert
-                            insert_idx = 0
-                            for idx, m in enumerate(payload):
-                                try:
-                                    if m.get('role') != 'system':
-                                        insert_idx = idx
-                                        break
-                                except Exception:
-                                    # If message shape unexpected, continue searching
-                                    continue
-                            else:
-                                # all items were system messages; append at end
-                                insert_idx = len(payload)
-                            try:
-                                payload.insert(insert_idx, {"role": "system", "content": prefs_text})
-                            except Exception:
-                                # Fallback to appending if insert fails
-                                try:
-                                    payload.append({"role": "system", "content": prefs_text})
-                                except Exception:
-                                    pass
+                if prefs_text:
+                    # Find the first index where role != 'system' and insert
+                    insert_idx = 0
+                    for idx, m in enumerate(payload):
+                        try:
+                            if m.get('role') != 'system':
+                                insert_idx = idx
+                                break
+                        except Exception:
+                            # If message shape unexpected, continue searching
+                            continue
+                    else:
+                        # all items were system messages; append at end
+                        insert_idx = len(payload)
+                    try:
+                        payload.insert(insert_idx, {"role": "system", "content": prefs_text})
+                    except Exception:
+                        # Fallback to appending if insert fails
+                        _safe(payload.append, {"role": "system", "content": prefs_text})
             except Exception:
                 pass
 
             # Send user message either to the local OpenAI API (gpt-4o-mini) or to the configured server endpoint
             ai_reply = ''
             try:
-                if 'use_local_var' in globals() and use_local_var.get():
-                    # Local call using the stored API key
-                    ai_reply = call_local_openai(payload)
+                if use_local_var.get():
+                    # Local call using the stored API key, streamed into the chat area
+                    ai_reply = await call_local_openai(payload, on_delta=queue_delta)
                 else:
                     # Centralized server call
-                    ai_reply = call_server_api(payload)
+                    ai_reply = await call_server_api(payload)
             except Exception:
                 # Re-raise to be handled by outer exception handler
                 raise
 
-            # Update history (append assistant reply using the active preset label)
-            ts = time.strftime('%Y-%m-%d %H:%M:%S')
-            history.append((preset_label, ai_reply, ts))
-            # Also append to the untrimmed full_history for persistence
-            full_history.append((preset_label, ai_reply, ts))
-            try:
-                _trim_history()
-            except Exception:
-                pass
+            # Mark response as received so a timeout firing from now on does nothing
+            response_received[0] = True
+            ts = int(time.time())
 
-            # Schedule UI update on main thread: replace the last AI placeholder with real reply
+            # Schedule UI update on main thread: replace the last AI placeholder with real reply.
+            # History is only changed on the Tk thread, and the entry is appended right
+            # before it is rendered, so the newest entry is always this reply
             def on_success():
-                # Mark response as received to cancel timeout
-                response_received[0] = True
-                try:
-                    root.after_cancel(timeout_id)
-                except Exception:
-                    pass
+                _safe(root.after_cancel, timeout_id)
+                # Update history (append assistant reply using the active preset label)
+                STATE.history.append((preset_label, ai_reply, ts))
+                # Also append to the untrimmed full_history for persistence
+                STATE.full_history.append(preset_label, ai_reply, ts)
 
-                # Re-render the chat_area from history to keep it simple and robust
-                render_history()
-                try:
-                    send_btn.config(state=tk.NORMAL)
-                except Exception:
-                    pass
-                # Avoid closing over a name 'entry' from an enclosing scope which
-                # may be shadowed by local variables earlier in this function
-                # (e.g. during preference merging)
-                # Use the global widget reference to ensure we enable the correct Entry widget
-                try:
-                    ent = globals().get('entry')
-                    if ent is not None:
-                        ent.config(state=tk.NORMAL)
-                except Exception:
-                    pass
-                try:
-                    show_ts_cb.config(state=tk.NORMAL)
-                except Exception:
-                    pass
+                # Swap the placeholder for the reply, earlier lines are left untouched
+                replace_placeholder()
+                _set_send_enabled(True)
 
             root.after(0, on_success)
 
-        except Exception as e:
-            err_text = f"Error: {str(e)}"
+            # Extract preferences (every PREFS_EXTRACT_EVERY messages, it costs a second model
+            # call) as a separate task once the reply is on its way to the screen, so the
+            # reply never waits for it. New preferences apply from the next message
+            # (messages left over at New Conversation or exit go through flush_pending_prefs)
+            if extract_prefs:
+                run_coro(extract_and_merge_prefs(message, user_msgs))
 
-            # Append an error entry to history (use preset label)
-            ts = time.strftime('%Y-%m-%d %H:%M:%S')
-            history.append((preset_label, err_text, ts))
-            full_history.append((preset_label, err_text, ts))
-            try:
-                _trim_history()
-            except Exception:
-                pass
-            try:
-                _trim_history()
-            except Exception:
-                pass
+        except Exception as e:
+            err_text = f"Error: {e}"
 
             # Mark response as received to cancel timeout (even for errors)
             response_received[0] = True
-            try:
-                root.after_cancel(timeout_id)
-            except Exception:
-                pass
+            ts = int(time.time())
 
             # Re-enable controls on error
             def on_error():
-                try:
-                    send_btn.config(state=tk.NORMAL)
-                except Exception:
-                    pass
-                try:
-                    ent = globals().get('entry')
-                    if ent is not None:
-                        ent.config(state=tk.NORMAL)
-                except Exception:
-                    pass
-                try:
-                    show_ts_cb.config(state=tk.NORMAL)
-                except Exception:
-                    pass
-                render_history()
+                _safe(root.after_cancel, timeout_id)
+                # Append an error entry to history (use preset label), on the Tk thread
+                STATE.history.append((preset_label, err_text, ts))
+                STATE.full_history.append(preset_label, err_text, ts)
+                _set_send_enabled(True)
+                replace_placeholder()
 
             root.after(0, on_error)
 
 
-    # Start the worker thread to handle the API call asynchronously
-    thread = threading.Thread(target=worker, args=(messages_for_gpt,), daemon=True)
-    thread.start()
+    # Schedule the worker on the shared network loop (no thread is spawned per message)
+    run_coro(worker(messages_for_gpt))
 
 
 def select_ai_model():
@@ -1284,10 +1329,7 @@ def select_ai_model():
 
         dlg = tk.Toplevel(root)
         dlg.title('Select AI Model')
-        try:
-            dlg.transient(root)
-        except Exception:
-            pass
+        _safe(dlg.transient, root)
         dlg.resizable(False, False)
 
         tk.Label(dlg, text='Choose the AI model for local OpenAI API calls:', wraplength=400, justify='left').pack(padx=16, pady=(12,6))
@@ -1304,21 +1346,12 @@ def select_ai_model():
 
         def on_save():
             selected = model_var.get()
-            try:
-                save_settings(True, ai_model=selected)
-            except Exception:
-                pass
-            try:
-                dlg.destroy()
-            except Exception:
-                pass
+            _safe(save_settings, True, ai_model=selected)
+            _safe(dlg.destroy)
             messagebox.showinfo('AI Model', f'Model set to {selected}.')
 
         def on_cancel():
-            try:
-                dlg.destroy()
-            except Exception:
-                pass
+            _safe(dlg.destroy)
 
         tk.Button(btn_frame, text='Save', command=on_save, width=10).pack(side=tk.LEFT, padx=6)
         tk.Button(btn_frame, text='Cancel', command=on_cancel, width=10).pack(side=tk.LEFT, padx=6)
@@ -1327,10 +1360,7 @@ def select_ai_model():
             dlg.grab_set()
             root.wait_window(dlg)
         except Exception:
-            try:
-                root.wait_window(dlg)
-            except Exception:
-                pass
+            _safe(root.wait_window, dlg)
     except Exception as e:
         messagebox.showerror('AI Model', str(e))
 
@@ -1340,55 +1370,58 @@ def load_history():
     render_history()
 
 
+def flush_pending_prefs():
+    # Extract preferences from user messages the extractor has not seen yet, returns
+    # the extraction's future (None when nothing is pending)
+    pending = STATE.pending_prefs_msgs
+    if not pending:
+        return None
+    STATE.pending_prefs_msgs = []
+    return run_coro(extract_and_merge_prefs(pending[-1], pending[:-1]))
+
+
 def new_conversation():
     if messagebox.askyesno("New Conversation", "Start a new conversation? This will clear the current chat history."):
-        history.clear()
-        full_history.clear()
+        # Messages since the last extraction still count towards preferences
+        flush_pending_prefs()
+        STATE.history.clear()
+        STATE.full_history.clear()
+        _render_cache.clear()
         # Re-render (will clear the display and keep widget state consistent)
         render_history()
         set_conversation_title('New Conversation')
         # Reset saved-state tracking
-        try:
-            global current_conversation_path, unsaved_changes
-            current_conversation_path = None
-            unsaved_changes = False
-        except Exception:
-            pass
+        STATE.current_conversation_path = None
+        STATE.unsaved_changes = False
+        STATE.saved_digest = None
+
+
+def _history_digest() -> str:
+    # Short content hash of full_history, used to tell whether it still matches disk
+    return hashlib.blake2b(_dumps(STATE.full_history.rows(), indent=False).encode('utf-8'), digest_size=8).hexdigest()
 
 
 def save_conversation():
-    # Default to the 'conversations' folder next to the script
-    conv_dir = os.path.join(os.path.dirname(__file__), 'conversations')
-    try:
-        os.makedirs(conv_dir, exist_ok=True)
-    except Exception:
-        pass
-    path = filedialog.asksaveasfilename(initialdir=conv_dir, defaultextension='.json', filetypes=[('JSON files','*.json'), ('All files','*.*')])
+    from tkinter import filedialog
+    # Default to the 'conversations' folder next to the script (created at startup)
+    path = filedialog.asksaveasfilename(initialdir=CONV_DIR, defaultextension='.json', filetypes=[('JSON files','*.json'), ('All files','*.*')])
     if not path:
         return False
     try:
-        # Save the full, untrimmed conversation (full_history)
-        serial = []
-        for item in full_history:
-            if isinstance(item, (list, tuple)):
-                serial.append(list(item))
-            else:
-                serial.append([str(item)])
+        # Save the full, untrimmed conversation (full_history) as a list of
+        # [role, message, ts] entries
         with open(path, 'w', encoding='utf-8') as f:
-            json.dump(serial, f, ensure_ascii=False, indent=2)
+            f.write(_dumps(STATE.full_history.rows()))
         # Update conversation title to the saved filename (strip directory and extension)
         try:
             fname = os.path.basename(path)
             set_conversation_title(fname)
         except Exception:
             pass
-        # update saved-state tracking
-        try:
-            global current_conversation_path, unsaved_changes
-            current_conversation_path = path
-            unsaved_changes = False
-        except Exception:
-            pass
+        # update saved-state tracking
+        STATE.current_conversation_path = path
+        STATE.unsaved_changes = False
+        STATE.saved_digest = _history_digest()
         messagebox.showinfo('Saved', f'Conversation saved to {path}')
         return True
     except Exception as e:
@@ -1397,40 +1430,35 @@ def save_conversation():
 
 
 def load_conversation_file():
-    # Default to the 'conversations' folder next to the script
-    conv_dir = os.path.join(os.path.dirname(__file__), 'conversations')
-    try:
-        os.makedirs(conv_dir, exist_ok=True)
-    except Exception:
-        pass
-    path = filedialog.askopenfilename(initialdir=conv_dir, filetypes=[('JSON files','*.json'), ('All files','*.*')])
+    from tkinter import filedialog
+    # Default to the 'conversations' folder next to the script (created at startup)
+    path = filedialog.askopenfilename(initialdir=CONV_DIR, filetypes=[('JSON files','*.json'), ('All files','*.*')])
     if not path:
         return
     try:
         with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+            data = _loads(f.read())
         # Expecting a list of [role, message] pairs
         if isinstance(data, list):
-            history.clear()
-            full_history.clear()
-            for item in data:
-                # item may be [role, message] or [role, message, timestamp]
-                if isinstance(item, list) or isinstance(item, tuple):
-                    if len(item) >= 2:
-                        role = item[0]
-                        msg = item[1]
-                        ts = item[2] if len(item) > 2 else time.strftime('%Y-%m-%d %H:%M:%S')
-                        history.append((role, msg, ts))
-                        full_history.append((role, msg, ts))
+            # item may be [role, message] or [role, message, timestamp], older files
+            # store formatted timestamp strings and entries without one share one "now"
+            now = int(time.time())
+            normalized = [
+                (item[0], item[1], _parse_ts(item[2]) if len(item) > 2 else now)
+                for item in data if isinstance(item, (list, tuple)) and len(item) >= 2
+            ]
+            STATE.history.clear()
+            STATE.full_history.clear()
+            _render_cache.clear()
+            # The history deque keeps only the newest history_limit entries
+            STATE.history.extend(normalized)
+            STATE.full_history.extend(normalized)
             render_history()
             set_conversation_title(os.path.basename(path))
             # update saved-state tracking
-            try:
-                global current_conversation_path, unsaved_changes
-                current_conversation_path = path
-                unsaved_changes = False
-            except Exception:
-                pass
+            STATE.current_conversation_path = path
+            STATE.unsaved_changes = False
+            STATE.saved_digest = _history_digest()
             messagebox.showinfo('Loaded', f'Conversation loaded from {path}')
     except Exception as e:
         messagebox.showerror('Load error', str(e))
@@ -1438,21 +1466,12 @@ def load_conversation_file():
 
 def limit_chat():
     try:
-        # Determine current value (fallback to 10 if not set)
-        cur = globals().get('HISTORY_LIMIT', None)
-        if cur is None:
-            try:
-                loaded = load_settings() or {}
-                cur = int(loaded.get('ai_history_lines') or 10)
-            except Exception:
-                cur = 10
+        # Determine current value
+        cur = STATE.history_limit
         # Present a slider dialog (0-50) so users can visually set the limit
         dlg = tk.Toplevel(root)
         dlg.title('AI Chat Memory Limit')
-        try:
-            dlg.transient(root)
-        except Exception:
-            pass
+        _safe(dlg.transient, root)
         dlg.resizable(False, False)
         tk.Label(dlg, text='Number of recent chat lines to include when sending context to the AI:', wraplength=420, justify='left').pack(padx=12, pady=(10,6), anchor='w')
         # Enforce visible limits
@@ -1476,31 +1495,21 @@ def limit_chat():
         def on_save():
             val = int(slider_var.get())
             try:
-                cur_use = use_local_var.get() if 'use_local_var' in globals() and isinstance(use_local_var, tk.BooleanVar) else True
+                cur_use = use_local_var.get()
             except Exception:
                 cur_use = True
             try:
                 save_settings(bool(cur_use), ai_history_lines=int(val))
             except Exception:
                 pass
-            try:
-                globals()['HISTORY_LIMIT'] = int(val)
-            except Exception:
-                globals()['HISTORY_LIMIT'] = cur
-            try:
-                dlg.destroy()
-            except Exception:
-                pass
-            try:
-                messagebox.showinfo('AI Chat Memory Limit', 'AI short-term memory updated.')
-            except Exception:
-                pass
+            STATE.history_limit = int(val)
+            # Reallocate so the new limit applies (keeps the newest entries)
+            STATE.history = deque(STATE.history, maxlen=STATE.history_limit)
+            _safe(dlg.destroy)
+            _safe(messagebox.showinfo, 'AI Chat Memory Limit', 'AI short-term memory updated.')
 
         def on_cancel():
-            try:
-                dlg.destroy()
-            except Exception:
-                pass
+            _safe(dlg.destroy)
 
         tk.Button(btnf, text='Save', command=on_save, width=10).pack(side=tk.LEFT, padx=6)
         tk.Button(btnf, text='Cancel', command=on_cancel, width=10).pack(side=tk.LEFT, padx=6)
@@ -1509,34 +1518,19 @@ def limit_chat():
             scale.focus_force()
             root.wait_window(dlg)
         except Exception:
-            try:
-                root.wait_window(dlg)
-            except Exception:
-                pass
+            _safe(root.wait_window, dlg)
     except Exception as e:
-        try:
-            messagebox.showerror('AI Chat Memory Limit', str(e))
-        except Exception:
-            pass
+        _safe(messagebox.showerror, 'AI Chat Memory Limit', str(e))
 
 
 def limit_prefs():
     try:
-        # Determine current value (fallback to PREFS_LIMIT or default)
-        cur = globals().get('PREFS_LIMIT', None)
-        if cur is None:
-            try:
-                loaded = load_settings() or {}
-                cur = int(loaded.get('pref_memory_lines') or PREFS_DEFAULT_LINES)
-            except Exception:
-                cur = PREFS_DEFAULT_LINES
+        # Determine current value
+        cur = STATE.prefs_limit
         # Present a slider dialog (0-50) for preference entry limit
         dlg = tk.Toplevel(root)
         dlg.title('AI Preference Memory Limit')
-        try:
-            dlg.transient(root)
-        except Exception:
-            pass
+        _safe(dlg.transient, root)
         dlg.resizable(False, False)
         tk.Label(dlg, text='Maximum number of preference lines to retain (oldest are dropped when exceeded):', wraplength=420, justify='left').pack(padx=12, pady=(10,6), anchor='w')
         slider_var = tk.IntVar(value=max(0, min(50, int(cur))))
@@ -1559,31 +1553,19 @@ def limit_prefs():
         def on_save():
             val = int(slider_var.get())
             try:
-                cur_use = use_local_var.get() if 'use_local_var' in globals() and isinstance(use_local_var, tk.BooleanVar) else True
+                cur_use = use_local_var.get()
             except Exception:
                 cur_use = True
             try:
                 save_settings(bool(cur_use), pref_memory_lines=int(val))
             except Exception:
                 pass
-            try:
-                globals()['PREFS_LIMIT'] = int(val)
-            except Exception:
-                globals()['PREFS_LIMIT'] = cur
-            try:
-                dlg.destroy()
-            except Exception:
-                pass
-            try:
-                messagebox.showinfo('AI Preference Memory Limit', 'Preference memory limit updated.')
-            except Exception:
-                pass
+            STATE.prefs_limit = int(val)
+            _safe(dlg.destroy)
+            _safe(messagebox.showinfo, 'AI Preference Memory Limit', 'Preference memory limit updated.')
 
         def on_cancel():
-            try:
-                dlg.destroy()
-            except Exception:
-                pass
+            _safe(dlg.destroy)
 
         tk.Button(btnf, text='Save', command=on_save, width=10).pack(side=tk.LEFT, padx=6)
         tk.Button(btnf, text='Cancel', command=on_cancel, width=10).pack(side=tk.LEFT, padx=6)
@@ -1592,15 +1574,9 @@ def limit_prefs():
             scale.focus_force()
             root.wait_window(dlg)
         except Exception:
-            try:
-                root.wait_window(dlg)
-            except Exception:
-                pass
+            _safe(root.wait_window, dlg)
     except Exception as e:
-        try:
-            messagebox.showerror('AI Preference Memory Limit', str(e))
-        except Exception:
-            pass
+        _safe(messagebox.showerror, 'AI Preference Memory Limit', str(e))
 
 
 def clear_prefs():
@@ -1646,10 +1622,7 @@ def open_personality_window():
     win = tk.Toplevel(root)
     win.title('Personality')
     # Make this Toplevel transient to the main window so the window manager treats it as a child
-    try:
-        win.transient(root)
-    except Exception:
-        pass
+    _safe(win.transient, root)
     # Do not hardcode geometry so the window can adapt to scaling, but with a reasonable minimum
     win.minsize(320, 300)
     open_personality_window.win = win
@@ -1657,57 +1630,28 @@ def open_personality_window():
     tk.Label(win, text='Personality', font=(None, 12, 'bold')).pack(pady=(6,4))
 
     # Presets map - name, tuple of slider values
-    presets = {
-        'Default AI': (2, 1, 0, 30, 1, 0, 0, 1),
-        'Helpful Professional': (2, 2, 0, 35, 1, 0, 0, 1),
-        'Casual Friendly': (3, 0, 0, 25, 1, 1, 0, 1),
-        'Playful Sarcastic': (2, 0, 1, 18, 1, 2, 2, 1),
-        'Child-Friendly': (3, 1, 0, 12, 1, 0, 0, 2),
-        'Stoic Professional': (1, 2, 0, 40, 1, 0, 0, 0),
-        'Sailor-Mouth': (0, 0, 2, 30, 1, 1, 2, 0),
-    }
-
-    # Presets file/dir paths
-    presets_path = os.path.join(os.path.dirname(__file__), 'presets.json')
-    presets_dir = os.path.join(os.path.dirname(__file__), 'personalities')
-    try:
-        os.makedirs(presets_dir, exist_ok=True)
-    except Exception:
-        pass
-
-    # Load any per-file presets from the personalities/ directory
-    try:
-        for fname in os.listdir(presets_dir):
-            if not fname.lower().endswith('.json'):
-                continue
-            name = os.path.splitext(fname)[0]
-            full = os.path.join(presets_dir, fname)
-            try:
-                with open(full, 'r', encoding='utf-8') as pf:
-                    loaded = json.load(pf)
-                # Support either a list of values or an object with 'values'
-                vals = None
-                if isinstance(loaded, list):
-                    vals = loaded
-                elif isinstance(loaded, dict) and 'values' in loaded:
-                    vals = loaded.get('values')
-                if vals and len(vals) >= 8:
-                    presets[name] = tuple(int(x) for x in vals[:8])
-            except Exception:
-                continue
-    except Exception:
-        pass
-
-    # Try to load last_selected from presets.json (keeps only the last selection)
-    try:
-        if os.path.exists(presets_path):
-            with open(presets_path, 'r', encoding='utf-8') as pf:
-                loaded = json.load(pf)
-            last_selected = loaded.get('last_selected') if isinstance(loaded, dict) else None
-        else:
-            last_selected = None
-    except Exception:
-        last_selected = None
+    presets = dict(DEFAULT_PRESETS)
+    _safe(os.makedirs, PRESETS_DIR, exist_ok=True)
+
+    # last_selected from presets.json (keeps only the last selection)
+    last_selected = _load_presets_json().get('last_selected')
+
+    # personalities/ files are merged in from the shared cache. If the cache is already
+    # warm (the title's active-preset lookup usually fills it) that costs a single stat,
+    # otherwise the directory scan waits until the preset menu is first clicked and only
+    # the last selected preset's own file is read now
+    disk_presets_loaded = [False]
+    if _disk_presets is not None:
+        presets.update(_load_disk_presets())
+        disk_presets_loaded[0] = True
+    elif last_selected and last_selected not in presets:
+        try:
+            with open(os.path.join(PRESETS_DIR, f"{last_selected}.json"), 'rb') as pf:
+                vals = _preset_values(_loads(pf.read()))
+            if vals:
+                presets[last_selected] = vals
+        except Exception:
+            pass
 
     # Include a 'Custom' label for when slider values don't match any listed preset
     preset_var = tk.StringVar(value=last_selected if (last_selected in presets) else 'Custom')
@@ -1715,10 +1659,6 @@ def open_personality_window():
     def apply_changes():
         # Read current slider vars into the shared summary and local summary
         update_summary()
-        try:
-            win_summary.config(text=summary_label.cget('text'))
-        except tk.TclError:
-            pass
 
     def apply_preset(name):
         # Apply the preset tuple to the personality variables and update summaries
@@ -1726,14 +1666,7 @@ def open_personality_window():
         if not vals:
             return
         try:
-            friendliness_var.set(vals[0])
-            professionalism_var.set(vals[1])
-            profanity_var.set(vals[2])
-            age_var.set(vals[3])
-            gender_var.set(vals[4])
-            humor_var.set(vals[5])
-            sarcasm_var.set(vals[6])
-            introversion_var.set(vals[7])
+            _apply_preset_values(vals)
         except Exception:
             # If any var is missing for some reason, ignore and continue
             pass
@@ -1746,35 +1679,59 @@ def open_personality_window():
     preset_menu = tk.OptionMenu(win, preset_var, *option_names, command=apply_preset)
     preset_menu.pack(fill=tk.X, padx=8)
 
+    # Labels currently in the OptionMenu, in order
+    menu_names = list(option_names)
+
+    def preset_command(name):
+        if name == 'Custom':
+            return lambda: preset_var.set('Custom')
+        return lambda: (preset_var.set(name), apply_preset(name))
+
     def update_preset_menu():
-        # Rebuild the OptionMenu items to reflect current presets dict
+        # Bring the OptionMenu items in line with the current presets dict, only
+        # touching entries that differ from what the menu already shows
         menu = preset_menu['menu']
-        menu.delete(0, 'end')
-        menu.add_command(label='Custom', command=lambda v='Custom': preset_var.set(v))
-        for name in sorted(presets.keys()):
-            menu.add_command(label=name, command=lambda v=name: (preset_var.set(v), apply_preset(v)))
+        preset_index[0] = None
+        new_names = ['Custom'] + sorted(presets.keys())
+        for i, name in enumerate(new_names):
+            if i >= len(menu_names):
+                menu.add_command(label=name, command=preset_command(name))
+            elif menu_names[i] != name:
+                menu.entryconfigure(i, label=name, command=preset_command(name))
+        if len(menu_names) > len(new_names):
+            menu.delete(len(new_names), 'end')
+        menu_names[:] = new_names
+
+    def load_disk_presets(_=None):
+        # Merge in personalities/ once, before the menu is first posted (widget
+        # bindings run ahead of the OptionMenu's class binding that posts it)
+        if disk_presets_loaded[0]:
+            return
+        disk_presets_loaded[0] = True
+        presets.update(_load_disk_presets())
+        update_preset_menu()
+
+    if not disk_presets_loaded[0]:
+        preset_menu.bind('<Button-1>', load_disk_presets, add='+')
 
     def save_preset_to_file():
+        global _disk_presets
         # Ask for a filename to save the current slider configuration
         tpl = current_values_tuple()
-        name = tk.simpledialog.askstring('Save preset', 'Preset name (file will be saved as <name>.json):')
+        from tkinter import simpledialog
+        name = simpledialog.askstring('Save preset', 'Preset name (file will be saved as <name>.json):')
         if not name:
             return
         fname = name.strip()
         if not fname:
             return
-        full = os.path.join(presets_dir, f"{fname}.json")
+        full = os.path.join(PRESETS_DIR, f"{fname}.json")
         data = {'values': list(tpl)}
         try:
-            tmp = full + '.tmp'
-            with open(tmp, 'w', encoding='utf-8') as pf:
-                json.dump(data, pf, ensure_ascii=False, indent=2)
-                pf.flush()
-                try:
-                    os.fsync(pf.fileno())
-                except Exception:
-                    pass
-            os.replace(tmp, full)
+            _atomic_write(full, _dumps(data), mode=0o644, quiet=False)
+            # Saved presets must show up in the active-preset lookup, even if the
+            # directory mtime didn't visibly change
+            _disk_presets = None
             # Add to presets dict and refresh menu
             presets[fname] = tpl
             update_preset_menu()
@@ -1784,24 +1741,20 @@ def open_personality_window():
             messagebox.showerror('Save error', str(e))
 
     def load_preset_from_file():
+        from tkinter import filedialog
         # Parent the file dialog so the OS places it above the personality window
         try:
-            path = filedialog.askopenfilename(initialdir=presets_dir, filetypes=[('JSON files','*.json'), ('All files','*.*')], parent=win)
+            path = filedialog.askopenfilename(initialdir=PRESETS_DIR, filetypes=[('JSON files','*.json'), ('All files','*.*')], parent=win)
         except Exception:
-            path = filedialog.askopenfilename(initialdir=presets_dir, filetypes=[('JSON files','*.json'), ('All files','*.*')])
+            path = filedialog.askopenfilename(initialdir=PRESETS_DIR, filetypes=[('JSON files','*.json'), ('All files','*.*')])
         if not path:
             return
         try:
             with open(path, 'r', encoding='utf-8') as pf:
-                loaded = json.load(pf)
-            vals = None
-            if isinstance(loaded, list):
-                vals = loaded
-            elif isinstance(loaded, dict) and 'values' in loaded:
-                vals = loaded.get('values')
-            if vals and len(vals) >= 8:
+                vals = _preset_values(_loads(pf.read()))
+            if vals:
                 name = os.path.splitext(os.path.basename(path))[0]
-                presets[name] = tuple(int(x) for x in vals[:8])
+                presets[name] = vals
                 update_preset_menu()
                 preset_var.set(name)
                 apply_preset(name)
@@ -1821,43 +1774,42 @@ def open_personality_window():
             int(age_var.get()), int(gender_var.get()), int(humor_var.get()), int(sarcasm_var.get()), int(introversion_var.get())
         )
 
+    # Values tuple -> preset name, first listed preset wins like the old linear scan
+    # (rebuilt lazily after update_preset_menu, which follows every presets edit)
+    preset_index = [None]
+
     def find_matching_preset(tpl):
-        for name, vals in presets.items():
-            if tuple(vals) == tpl:
-                return name
-        return 'Custom'
+        if preset_index[0] is None:
+            index = {}
+            for name, vals in presets.items():
+                index.setdefault(tuple(vals), name)
+            preset_index[0] = index
+        return preset_index[0].get(tpl, 'Custom')
 
     # Called when a Scale is manipulated by the user, update summary and preset selector
+    # (a drag fires this for every step, so the work is coalesced into one pass 30ms later)
+    slider_job = [None]
+
     def on_slider_change(_=None):
+        if slider_job[0] is not None:
+            _safe(win.after_cancel, slider_job[0])
+        slider_job[0] = win.after(30, apply_slider_change)
+
+    def apply_slider_change():
+        slider_job[0] = None
         try:
+            # also refreshes the local summary label
             update_summary()
         except Exception:
             pass
-        try:
-            # update local summary label if present
-            win_summary.config(text=summary_label.cget('text'))
-        except Exception:
-            pass
         try:
             preset_var.set(find_matching_preset(current_values_tuple()))
         except Exception:
-            try:
-                preset_var.set('Custom')
-            except Exception:
-                pass
-        # Update any mixer value labels if present
-        try:
-            for var_obj, lbl in value_label_pairs:
-                try:
-                    lbl.config(text=str(var_obj.get()))
-                except Exception:
-                    pass
-        except Exception:
-            pass
+            _safe(preset_var.set, 'Custom')
 
     # Mixer-style layout, vertical sliders arranged horizontally to use widescreen space
-    mixer_frame = tk.Frame(win)
-    mixer_frame.pack(fill=tk.X, padx=8, pady=(6,4))
+    # The whole bank is drawn on one Canvas (tracks, knobs and text items) instead of
+    # a Frame + Label + Scale + Label per slider, which is much cheaper to build
 
     # Define fields as (label, variable, min, max)
     # The last slider is 'Extroversion' conceptually (higher = more extroverted), but introversion was just kept for backwards compatibility
@@ -1872,78 +1824,171 @@ def open_personality_window():
         ('Extroversion', introversion_var, 0, 2),
     ]
 
-    # List of (tk.Variable, label widget) pairs for live updates
-    value_label_pairs = []
-
     # Reflow mixer into two rows x four columns to make the window narrower
-    scale_length = 120
+    # The track is at least one pixel per value, so every value can be picked with the mouse
+    scale_length = max(120, max(vmax - vmin for _label, _var, vmin, vmax in mixer_fields))
     cols = 4
     rows = (len(mixer_fields) + cols - 1) // cols
-    # Configure column sizes
-    for c in range(cols):
+    # Cell layout: name on top, the track (max at the top, min at the bottom), value below
+    cell_w = scale_length + 24
+    cell_h = scale_length + 76
+    track_top = 34
+    mixer = tk.Canvas(win, width=cols * cell_w, height=rows * cell_h, highlightthickness=0, bg=win.cget('bg'), takefocus=1)
+    mixer.pack(padx=8, pady=(6,4))
+
+    # Per slider: (variable, min, max, track x, track top y, knob item, value text item)
+    mixer_items = []
+
+    def knob_y(idx, value):
+        var_obj, vmin, vmax, x, top, knob, value_text = mixer_items[idx]
+        value = min(max(value, vmin), vmax)
+        return top + (vmax - value) * scale_length / (vmax - vmin)
+
+    def redraw_slider(idx):
+        # Move the knob and update the value text to match the variable
+        var_obj, vmin, vmax, x, top, knob, value_text = mixer_items[idx]
         try:
-            mixer_frame.columnconfigure(c, weight=1, minsize=scale_length + 12)
-        except Exception:
-            pass
+            value = int(var_obj.get())
+        except (tk.TclError, ValueError):
+            return
+        y = knob_y(idx, value)
+        mixer.coords(knob, x - 11, y - 5, x + 11, y + 5)
+        mixer.itemconfigure(value_text, text=str(value))
 
     for idx, (label_text, var_obj, vmin, vmax) in enumerate(mixer_fields):
         row = idx // cols
         col = idx % cols
-        col_frame = tk.Frame(mixer_frame, width=scale_length)
-        col_frame.grid(row=row, column=col, padx=6, pady=4, sticky='n')
-        lbl = tk.Label(col_frame, text=label_text, font=(None, 9), wraplength=scale_length, justify='center')
-        lbl.grid(row=0, column=0, pady=(0,6))
-        scale = tk.Scale(col_frame, from_=vmax, to=vmin, orient=tk.VERTICAL,
-                         variable=var_obj, command=on_slider_change, length=scale_length)
-        scale.grid(row=1, column=0)
-        val_lbl = tk.Label(col_frame, text=str(var_obj.get()), font=(None, 9))
-        val_lbl.grid(row=2, column=0, pady=(6,0))
-        value_label_pairs.append((var_obj, val_lbl))
+        x = col * cell_w + cell_w // 2
+        top = row * cell_h + track_top
+        mixer.create_text(x, row * cell_h + 14, text=label_text, font=(None, 9), width=scale_length, justify='center')
+        mixer.create_line(x, top, x, top + scale_length, width=4, fill='gray75', tags=(f'track{idx}',))
+        knob = mixer.create_rectangle(0, 0, 0, 0, fill='gray85', outline='gray40', tags=(f'knob{idx}',))
+        value_text = mixer.create_text(x, top + scale_length + 18, text='', font=(None, 9))
+        mixer_items.append((var_obj, vmin, vmax, x, top, knob, value_text))
+        redraw_slider(idx)
+
+    # Keep knobs in sync when the variables change from elsewhere (presets, loading),
+    # the traces are removed with the window since the variables outlive it
+    mixer_traces = []
+    for idx, (var_obj, *_rest) in enumerate(mixer_items):
+        mixer_traces.append((var_obj, var_obj.trace_add('write', lambda *_a, i=idx: redraw_slider(i))))
+
+    def remove_mixer_traces(_=None):
+        for var_obj, trace_id in mixer_traces:
+            _safe(var_obj.trace_remove, 'write', trace_id)
+        mixer_traces.clear()
+
+    mixer.bind('<Destroy>', remove_mixer_traces)
+
+    # Slider the current drag started on (None when the press missed every track)
+    drag_idx = [None]
+    # Slider the arrow keys adjust (the last one clicked), its knob is outlined in
+    # black while the canvas has keyboard focus
+    focus_idx = [0]
+
+    def show_focus(on):
+        mixer.itemconfigure(mixer_items[focus_idx[0]][5], outline='black' if on else 'gray40')
+
+    def set_focus_slider(idx):
+        show_focus(False)
+        focus_idx[0] = idx
+        show_focus(True)
+
+    def slider_at(x, y):
+        for idx, (var_obj, vmin, vmax, tx, top, knob, value_text) in enumerate(mixer_items):
+            if abs(x - tx) <= 14 and top - 8 <= y <= top + scale_length + 8:
+                return idx
+        return None
+
+    def set_slider(idx, value):
+        var_obj, vmin, vmax, x, top, knob, value_text = mixer_items[idx]
+        value = min(max(value, vmin), vmax)
+        try:
+            if int(var_obj.get()) == value:
+                return
+        except (tk.TclError, ValueError):
+            pass
+        # The trace redraws the knob, on_slider_change refreshes summary and preset
+        var_obj.set(value)
+        on_slider_change()
+
+    def drag_to(y):
+        idx = drag_idx[0]
+        if idx is None:
+            return
+        var_obj, vmin, vmax, x, top, knob, value_text = mixer_items[idx]
+        set_slider(idx, round(vmax - (y - top) * (vmax - vmin) / scale_length))
+
+    def step_slider(delta):
+        try:
+            value = int(mixer_items[focus_idx[0]][0].get())
+        except (tk.TclError, ValueError):
+            return 'break'
+        set_slider(focus_idx[0], value + delta)
+        return 'break'
+
+    def move_focus(delta):
+        set_focus_slider((focus_idx[0] + delta) % len(mixer_items))
+        return 'break'
+
+    def on_mixer_press(event):
+        mixer.focus_set()
+        drag_idx[0] = slider_at(event.x, event.y)
+        if drag_idx[0] is not None:
+            set_focus_slider(drag_idx[0])
+        drag_to(event.y)
+
+    def on_mixer_release(_=None):
+        drag_idx[0] = None
+
+    mixer.bind('<Button-1>', on_mixer_press)
+    mixer.bind('<B1-Motion>', lambda e: drag_to(e.y))
+    mixer.bind('<ButtonRelease-1>', on_mixer_release)
+    # Keyboard path: Up/Down step the focused slider, Left/Right pick another one
+    mixer.bind('<Up>', lambda e: step_slider(1))
+    mixer.bind('<Down>', lambda e: step_slider(-1))
+    mixer.bind('<Left>', lambda e: move_focus(-1))
+    mixer.bind('<Right>', lambda e: move_focus(1))
+    mixer.bind('<FocusIn>', lambda e: show_focus(True))
+    mixer.bind('<FocusOut>', lambda e: show_focus(False))
 
     # Summary shown in the window too (wraplength will be updated on resize)
     # Slightly smaller and greyed to be less prominent
     win_summary = tk.Label(win, text='', wraplength=280, justify='left', font=(None, 9, 'italic'), fg='gray40')
     win_summary.pack(padx=8, pady=10, fill=tk.X)
-
-    # Update the shared summary label and the local window label
-    def apply_changes():
-        # Read current slider vars into the shared summary and local summary
-        update_summary()
-        try:
-            win_summary.config(text=summary_label.cget('text'))
-        except tk.TclError:
-            pass
+    # update_summary mirrors the shared summary into this label
+    open_personality_window.win_summary = win_summary
 
     # Initialize window summary
-    win_summary.config(text=summary_label.cget('text'))
+    win_summary.config(text=_last_summary_text)
 
     # Ensure the preset selector matches the current slider values on open
-    def current_values_tuple():
-        return (
-            int(friendliness_var.get()), int(professionalism_var.get()), int(profanity_var.get()),
-            int(age_var.get()), int(gender_var.get()), int(humor_var.get()), int(sarcasm_var.get()), int(introversion_var.get())
-        )
-
-    def find_matching_preset(tpl):
-        for name, vals in presets.items():
-            if tuple(vals) == tpl:
-                return name
-        return 'Custom'
-
     # If last_selected was saved and exists, keep it, otherwise try to match current sliders
     if preset_var.get() not in presets:
         preset_var.set(find_matching_preset(current_values_tuple()))
 
     # Make the summary wrap adaptively when the Toplevel is resized
-    def on_win_configure(event):
+    # Resizes fire many events per second while dragging, so only the last one
+    # within 50ms is applied (the binding also sees every child's <Configure>)
+    configure_job = [None]
+
+    def apply_wraplength(width):
+        configure_job[0] = None
         # leave some padding (16px each side)
-        new_wrap = max(100, event.width - 32)
+        new_wrap = max(100, width - 32)
         try:
             win_summary.config(wraplength=new_wrap)
         except tk.TclError:
             # If the widget no longer exists, ignore
             pass
 
+    def on_win_configure(event):
+        if event.widget is not win:
+            return
+        if configure_job[0] is not None:
+            _safe(win.after_cancel, configure_job[0])
+        configure_job[0] = win.after(50, apply_wraplength, event.width)
+
     win.bind('<Configure>', on_win_configure)
 
     # Save presets and last selection when the window closes
@@ -1954,21 +1999,10 @@ def open_personality_window():
         last = matched if matched in presets else 'Custom'
         data = {'presets': {k: list(v) for k, v in presets.items()}, 'last_selected': last}
         try:
-            tmp_path = presets_path + '.tmp'
-            with open(tmp_path, 'w', encoding='utf-8') as pf:
-                json.dump(data, pf, ensure_ascii=False, indent=2)
-                pf.flush()
-                try:
-                    os.fsync(pf.fileno())
-                except Exception:
-                    pass
-            os.replace(tmp_path, presets_path)
+            _atomic_write(PRESETS_PATH, _dumps(data), mode=0o644, quiet=False, durable=False)
         except Exception as e:
             print('[presets] failed to write presets:', e)
-        try:
-            win.destroy()
-        except Exception:
-            pass
+        _safe(win.destroy)
 
     win.protocol('WM_DELETE_WINDOW', on_close)
 
@@ -1987,13 +2021,12 @@ def manage_api_key():
                 # Remove API key from settings
                 try:
                     # Mark that the API key was the most recently deleted
-                    save_settings(True if 'use_local_var' in globals() and use_local_var.get() else False, api_key='', last_deleted='api_key')
+                    save_settings(use_local_var.get(), api_key='', last_deleted='api_key')
                 except Exception:
                     pass
                 try:
                     # If API key is removed, switch to server mode
-                    if 'use_local_var' in globals() and isinstance(use_local_var, tk.BooleanVar):
-                        use_local_var.set(False)
+                    use_local_var.set(False)
                 except Exception:
                     pass
                 messagebox.showinfo('API Key', 'API key removed. Local mode has been disabled.')
@@ -2006,17 +2039,14 @@ def manage_api_key():
                     pass
                 return
             try:
-                save_settings(False if 'use_local_var' in globals() and not use_local_var.get() else use_local_var.get(), api_key=key.strip())
+                save_settings(use_local_var.get(), api_key=key.strip())
             except Exception:
                 pass
             messagebox.showinfo('API Key', 'API key saved to disk and settings.')
 
         dlg = tk.Toplevel(root)
         dlg.title('API Key')
-        try:
-            dlg.transient(root)
-        except Exception:
-            pass
+        _safe(dlg.transient, root)
         tk.Label(dlg, text='API Key (leave empty to remove):').pack(padx=12, pady=(10,4), anchor='w')
         entry_val = tk.StringVar()
         if cur:
@@ -2031,16 +2061,10 @@ def manage_api_key():
             if val == '':
                 if messagebox.askyesno('Confirm', 'Remove saved API key from settings?'):
                     save_new(None)
-                    try:
-                        dlg.destroy()
-                    except Exception:
-                        pass
+                    _safe(dlg.destroy)
                 return
             save_new(val)
-            try:
-                dlg.destroy()
-            except Exception:
-                pass
+            _safe(dlg.destroy)
 
         btnf = tk.Frame(dlg)
         btnf.pack(pady=(6,12))
@@ -2051,10 +2075,7 @@ def manage_api_key():
             dlg.grab_set()
             root.wait_window(dlg)
         except Exception:
-            try:
-                root.wait_window(dlg)
-            except Exception:
-                pass
+            _safe(root.wait_window, dlg)
     except Exception as e:
         messagebox.showerror('API Key', str(e))
 
@@ -2073,13 +2094,12 @@ def manage_endpoint():
                 # Remove endpoint from settings
                 try:
                     # Mark that the server endpoint was the most recently deleted
-                    save_settings(True if 'use_local_var' in globals() and use_local_var.get() else False, endpoint='', last_deleted='server_endpoint')
+                    save_settings(use_local_var.get(), endpoint='', last_deleted='server_endpoint')
                 except Exception:
                     pass
                 try:
                     # If endpoint is removed, switch to server mode
-                    if 'use_local_var' in globals() and isinstance(use_local_var, tk.BooleanVar):
-                        use_local_var.set(True)
+                    use_local_var.set(True)
                 except Exception:
                     pass
                 messagebox.showinfo('Server endpoint', 'Server endpoint removed. Server mode has been disabled.')
@@ -2092,17 +2112,14 @@ def manage_endpoint():
                     pass
                 return
             try:
-                save_settings(False if 'use_local_var' in globals() and not use_local_var.get() else use_local_var.get(), endpoint=ep.strip())
+                save_settings(use_local_var.get(), endpoint=ep.strip())
             except Exception:
                 pass
             messagebox.showinfo('Server endpoint', 'Server endpoint saved to disk and settings.')
 
         dlg = tk.Toplevel(root)
         dlg.title('Server endpoint')
-        try:
-            dlg.transient(root)
-        except Exception:
-            pass
+        _safe(dlg.transient, root)
         tk.Label(dlg, text='Server endpoint URL (leave empty to remove):').pack(padx=12, pady=(10,4), anchor='w')
         entry_val = tk.StringVar()
         if cur:
@@ -2117,16 +2134,10 @@ def manage_endpoint():
             if val == '':
                 if messagebox.askyesno('Confirm', 'Remove saved server endpoint settings?'):
                     save_new(None)
-                    try:
-                        dlg.destroy()
-                    except Exception:
-                        pass
+                    _safe(dlg.destroy)
                 return
             save_new(val)
-            try:
-                dlg.destroy()
-            except Exception:
-                pass
+            _safe(dlg.destroy)
 
         btnf = tk.Frame(dlg)
         btnf.pack(pady=(6,12))
@@ -2137,10 +2148,7 @@ def manage_endpoint():
             dlg.grab_set()
             root.wait_window(dlg)
         except Exception:
-            try:
-                root.wait_window(dlg)
-            except Exception:
-                pass
+            _safe(root.wait_window, dlg)
     except Exception as e:
         messagebox.showerror('Server endpoint', str(e))
 
@@ -2152,10 +2160,7 @@ def toggle_use_local():
         save_settings(val)
         # If enabling local mode and no key exists, prompt for it immediately
         if val and not get_saved_api_key():
-            try:
-                prompt_for_api_key()
-            except Exception:
-                pass
+            _safe(prompt_for_api_key)
         # If enabling server mode and no endpoint exists, prompt for it
         if not val:
             try:
@@ -2168,9 +2173,10 @@ def toggle_use_local():
 
 
 def prompt_load_on_startup():
+    # Create conversations/ once per run, the save/load dialogs rely on it existing
     try:
-        conv_dir = os.path.join(os.path.dirname(__file__), 'conversations')
-        os.makedirs(conv_dir, exist_ok=True)
+        os.makedirs(CONV_DIR, exist_ok=True)
+        conv_dir = CONV_DIR
     except Exception:
         conv_dir = None
     try:
@@ -2178,8 +2184,9 @@ def prompt_load_on_startup():
         should_prompt = False
         if conv_dir and os.path.isdir(conv_dir):
             try:
-                items = [f for f in os.listdir(conv_dir) if os.path.isfile(os.path.join(conv_dir, f))]
-                should_prompt = len(items) > 0
+                # scandir entries know their type, and any() stops at the first file
+                with os.scandir(conv_dir) as it:
+                    should_prompt = any(e.is_file() for e in it)
             except Exception:
                 should_prompt = False
         if should_prompt:
@@ -2190,61 +2197,116 @@ def prompt_load_on_startup():
 
 
 def save_prefs_list(entries: list):
+    global _prefs_cache, _prefs_mtime
     try:
-        # Ensure serializable
-        serial = []
-        for e in entries:
-            serial.append({'line': str(e.get('line') or ''), 'ts': int(e.get('ts') or int(time.time()))})
-        _atomic_write(PREFS_PATH, json.dumps(serial, ensure_ascii=False, indent=2))
+        # Ensure serializable (entries without a timestamp all get the same one)
+        now = int(time.time())
+        serial = [{'line': str(e.get('line') or ''), 'ts': int(e.get('ts') or now)} for e in entries]
+        # Compact JSON, the file isn't meant to be hand-edited and this text is also
+        # what gets sent to the model as the preferences context
+        text = _dumps(serial, indent=False)
+        _atomic_write(PREFS_PATH, text, quiet=False, durable=False)
+        # Mirror what was written so the next read skips the file (a failed write
+        # raises above and leaves the mirror matching the old file)
+        try:
+            _prefs_mtime = os.stat(PREFS_PATH).st_mtime_ns
+            _prefs_cache = (text.strip(), serial)
+        except Exception:
+            _prefs_cache = None
     except Exception:
         pass
 
 
-def _trim_history():
+def _safe(fn, *args, **kwargs):
+    # Call fn and swallow any exception (returns None then), for best-effort
+    # calls like destroying a dialog that may already be gone
     try:
-        _limit = globals().get('HISTORY_LIMIT', None)
-        if isinstance(_limit, int):
-            while len(history) > _limit:
-                history.pop(0)
-        else:
-            while len(history) > 10:
-                history.pop(0)
+        return fn(*args, **kwargs)
     except Exception:
-        try:
-            while len(history) > 10:
-                history.pop(0)
-        except Exception:
-            pass
+        return None
 
 
-def _atomic_write(path: str, text: str, mode: int = 0o600):
+def _atomic_write(path: str, text: str, mode: int = 0o600, quiet: bool = True, durable: bool = True):
+    # Unique tmp name per process/thread so O_EXCL catches a stray leftover
+    # instead of two writers sharing the same tmp file
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    data = text.encode('utf-8')
+    expected = hashlib.sha256(data).hexdigest()
     try:
-        tmp = path + '.tmp'
-        with open(tmp, 'w', encoding='utf-8') as tf:
-            tf.write(text)
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode)
+        with os.fdopen(fd, 'wb') as tf:
+            tf.write(data)
             tf.flush()
+            # durable=False skips the fsyncs for files that can afford to lose the
+            # last write on a power cut (the rename itself stays atomic)
+            if durable:
+                _safe(os.fsync, tf.fileno())
+        # Read the tmp file back and only let it replace the original if it holds
+        # exactly what was written, a silently truncated write keeps the old file
+        digest = hashlib.sha256()
+        with open(tmp, 'rb') as tf:
+            for block in iter(lambda: tf.read(65536), b''):
+                digest.update(block)
+        if digest.hexdigest() != expected:
+            raise OSError(f"write verification failed for {path}")
+        os.replace(tmp, path)
+        _safe(os.chmod, path, mode)
+        # Flush the directory entry too so the rename itself survives a crash
+        # (not possible on Windows, which has no O_DIRECTORY)
+        if durable and hasattr(os, 'O_DIRECTORY'):
             try:
-                os.fsync(tf.fileno())
+                dfd = os.open(os.path.dirname(path) or '.', os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(dfd)
+                finally:
+                    os.close(dfd)
             except Exception:
                 pass
-        os.replace(tmp, path)
-        try:
-            os.chmod(path, mode)
-        except Exception:
-            pass
+        _journal_write(path, expected, len(data), durable)
+    except Exception:
+        _safe(os.unlink, tmp)
+        # Best-effort by default, don't raise to avoid breaking startup
+        if not quiet:
+            raise
+
+
+def _journal_write(path: str, sha256: str, size: int, durable: bool = True):
+    # One JSON line per completed write in a '.writejournal.jsonl' next to the file,
+    # so a corrupt or missing file can be matched against what was last written.
+    # Append-only, once it passes WRITE_JOURNAL_MAX_BYTES it is rotated to
+    # '.writejournal.jsonl.1' (replacing the older one) and a new journal is started
+    row = json.dumps({'ts': int(time.time()), 'path': os.path.basename(path), 'sha256': sha256, 'bytes': size})
+    try:
+        journal = os.path.join(os.path.dirname(path), '.writejournal.jsonl')
+        with _journal_lock:
+            try:
+                if os.stat(journal).st_size >= WRITE_JOURNAL_MAX_BYTES:
+                    os.replace(journal, f"{journal}.1")
+            except OSError:
+                pass
+            fd = os.open(journal, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+            try:
+                os.write(fd, (row + '\n').encode('utf-8'))
+                if durable:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
     except Exception:
-        # Best-effort only, don't raise to avoid breaking startup
         pass
 
 
 def save_settings(use_local: bool, api_key: str | None = None, endpoint: str | None = None, last_deleted: str | None = None, ai_history_lines: int | None = None, pref_memory_lines: int | None = None, ai_model: str | None = None):
+    with _settings_lock:
+        _save_settings_locked(use_local, api_key, endpoint, last_deleted, ai_history_lines, pref_memory_lines, ai_model)
+
+
+def _save_settings_locked(use_local, api_key, endpoint, last_deleted, ai_history_lines, pref_memory_lines, ai_model):
+    global _settings_cache, _settings_raw, _settings_mtime
     try:
-        # Load existing settings to preserve unrelated fields
-        data = {}
+        # Start from the cached settings to preserve unrelated fields (the file is
+        # only read if it changed outside the app)
         try:
-            if os.path.exists(SETTINGS_PATH):
-                with open(SETTINGS_PATH, 'r', encoding='utf-8') as sf:
-                    data = json.load(sf) or {}
+            data = dict(_load_settings_raw())
         except Exception:
             data = {}
         data['use_local_ai'] = bool(use_local)
@@ -2266,10 +2328,7 @@ def save_settings(use_local: bool, api_key: str | None = None, endpoint: str | N
         if last_deleted is not None:
             if last_deleted:
                 data['last_credential_deleted'] = str(last_deleted)
-                try:
-                    data['last_credential_deleted_ts'] = int(time.time())
-                except Exception:
-                    pass
+                data['last_credential_deleted_ts'] = int(time.time())
             else:
                 data.pop('last_credential_deleted', None)
                 data.pop('last_credential_deleted_ts', None)
@@ -2278,52 +2337,103 @@ def save_settings(use_local: bool, api_key: str | None = None, endpoint: str | N
         # the user's choice, if ai_history_lines is None we leave the value
         # unchanged, an explicit integer will be stored (and should be a
         # small non-negative number)
+        # (invalid values are ignored, 0 is a valid limit)
         if ai_history_lines is not None:
-            try:
-                data['ai_history_lines'] = int(ai_history_lines)
-            except Exception:
-                # ignore invalid values
-                pass
+            value = _safe(int, ai_history_lines)
+            if value is not None:
+                data['ai_history_lines'] = value
         # Persist preference memory limit if provided
         if pref_memory_lines is not None:
-            try:
-                data['pref_memory_lines'] = int(pref_memory_lines)
-            except Exception:
-                pass
+            value = _safe(int, pref_memory_lines)
+            if value is not None:
+                data['pref_memory_lines'] = value
         # Persist AI model if provided
         if ai_model is not None:
-            try:
-                data['ai_model'] = str(ai_model)
-            except Exception:
-                pass
-        _atomic_write(SETTINGS_PATH, json.dumps(data, ensure_ascii=False, indent=2))
+            data['ai_model'] = str(ai_model)
+        _atomic_write(SETTINGS_PATH, _dumps(data), quiet=False)
+        # Update the cache in place with what was written
+        _settings_raw = data
+        _settings_cache = _settings_view(data)
+        _settings_mtime = os.stat(SETTINGS_PATH).st_mtime_ns
     except Exception:
-        pass
-
-
-def call_local_openai(messages_for_gpt):
+        # Force the next load_settings() to re-read the file
+        _settings_raw = None
+
+
+def _get_net_loop():
+    # Lazily start the background event loop the first time a call is scheduled
+    global _net_loop
+    with _net_loop_lock:
+        if _net_loop is None:
+            _net_loop = asyncio.new_event_loop()
+            threading.Thread(target=_net_loop.run_forever, daemon=True).start()
+    return _net_loop
+
+
+def run_coro(coro):
+    # Schedule a coroutine on the network loop and return a concurrent.futures.Future
+    return asyncio.run_coroutine_threadsafe(coro, _get_net_loop())
+
+
+def _get_http_client():
+    # Only called from coroutines on the network loop, so no locking is needed
+    global _http_client
+    if _http_client is None:
+        import httpx
+        # Keep idle connections warm between messages so follow-up calls skip the
+        # TCP/TLS handshake, and retry failed connection attempts twice (both are
+        # transport settings, AsyncClient ignores its own limits= once a transport is given)
+        limits = httpx.Limits(max_connections=8, max_keepalive_connections=8, keepalive_expiry=120)
+        _http_client = httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(limits=limits, retries=2))
+    return _http_client
+
+
+def _get_openai_client(api_key: str):
+    # Rebuild the client only when the API key changes, the HTTP pool is shared either way
+    global _openai_client, _openai_client_key
+    if _openai_client is None or _openai_client_key != api_key:
+        from openai import AsyncOpenAI
+        _openai_client = AsyncOpenAI(api_key=api_key, http_client=_get_http_client())
+        _openai_client_key = api_key
+    return _openai_client
+
+
+async def call_local_openai(messages_for_gpt, on_delta=None):
+    # With on_delta the reply is streamed, on_delta(text) is called for each piece
+    # as it arrives (on the network loop) and the joined text is returned at the end
     OPENAI_API_KEY = get_saved_api_key()
     if not OPENAI_API_KEY:
         raise RuntimeError('No OpenAI API key available for local calls')
     try:
-        client = OpenAI(api_key=OPENAI_API_KEY)
+        client = _get_openai_client(OPENAI_API_KEY)
         model = get_saved_ai_model()
-        kwargs = {'model': model, 'messages': messages_for_gpt}
-        if model.startswith('gpt-5'):
-            kwargs['reasoning_effort'] = 'minimal'
-            kwargs['verbosity'] = 'low'
-        response = client.chat.completions.create(**kwargs)
-        content = response.choices[0].message.content
-        return content or ''
+        extra = _MODEL_KWARGS.get(model)
+        if extra is None:
+            extra = {'reasoning_effort': 'minimal', 'verbosity': 'low'} if model.startswith('gpt-5') else {}
+            _MODEL_KWARGS[model] = extra
+        if on_delta is None:
+            response = await client.chat.completions.create(model=model, messages=messages_for_gpt, **extra)
+            content = response.choices[0].message.content
+            return content or ''
+        stream = await client.chat.completions.create(model=model, messages=messages_for_gpt, stream=True, **extra)
+        parts = []
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                on_delta(delta)
+        return ''.join(parts)
     except Exception as e:
         raise
 
 
-def call_server_api(messages_for_gpt):
+async def call_server_api(messages_for_gpt):
     try:
         # Prefer any user-configured endpoint stored in settings.json
         ep = get_saved_endpoint() or endpoint
-        resp = requests.post(ep, json={'messages': messages_for_gpt}, timeout=30)
+        resp = await _get_http_client().post(ep, json={'messages': messages_for_gpt}, timeout=30)
         resp.raise_for_status()
         data = resp.json()
         return data.get('response', '') if isinstance(data, dict) else ''
@@ -2331,88 +2441,293 @@ def call_server_api(messages_for_gpt):
         raise
 
 
+def _chat_at_bottom() -> bool:
+    # True when the chat area is scrolled to the end, new text only scrolls the
+    # view along in that case so reading older messages isn't interrupted
+    try:
+        return chat_area.yview()[1] >= 0.999
+    except tk.TclError:
+        return True
+
+
 def append_chat(text: str):
+    follow = _chat_at_bottom()
     chat_area.config(state=tk.NORMAL)
     chat_area.insert(tk.END, text)
-    chat_area.see(tk.END)
+    if follow:
+        chat_area.see(tk.END)
     chat_area.config(state=tk.DISABLED)
 
 
 def insert_labeled_message(role: str, message: str, ts: str = '', prefix_colon: bool = True):
+    follow = _chat_at_bottom()
     chat_area.config(state=tk.NORMAL)
-    # choose tag for role
-    tag = 'user_label' if role == 'You' else 'assistant_label'
-    # insert role with tag
-    chat_area.insert(tk.END, role, tag)
-    # insert timestamp and rest; optionally include colon separator
-    ts_text = f" [{ts}]" if (ts and show_timestamps_var.get()) else ''
+    tag = _role_tag(role)
+    # timestamp and rest; optionally include colon separator
+    # (always inserted, the 'timestamp' tag hides it while timestamps are off)
+    ts_text = f" [{ts}]" if ts else ''
     sep = ': ' if prefix_colon else ' '
-    chat_area.insert(tk.END, f"{ts_text}{sep}{message}\n\n")
     # extra spacer for assistant replies
-    if role != 'You':
-        chat_area.insert(tk.END, "\n")
-    chat_area.see(tk.END)
+    spacer = "\n" if role != 'You' else ''
+    # role with tag, timestamp and the untagged rest, in one insert
+    chat_area.insert(tk.END, role, (tag,), ts_text, ('timestamp',), f"{sep}{message}\n\n{spacer}", ())
+    if follow:
+        chat_area.see(tk.END)
+    chat_area.config(state=tk.DISABLED)
+
+
+@lru_cache(maxsize=4096)
+def _fmt_ts(ts) -> str:
+    # Format an epoch timestamp for display (strings from older files pass through),
+    # memoized since the same entries are formatted again on every load/render
+    if isinstance(ts, str):
+        return ts
+    return time.strftime(TS_FORMAT, time.localtime(ts))
+
+
+def _parse_ts(ts) -> int:
+    # Epoch seconds from a stored timestamp, accepting legacy formatted strings
+    try:
+        if isinstance(ts, str):
+            return int(time.mktime(time.strptime(ts, TS_FORMAT)))
+        return int(ts)
+    except Exception:
+        return int(time.time())
+
+
+def _role_tag(role: str) -> str:
+    # Chat area tag for a role label (the user is 'You', everything else is the assistant)
+    return 'user_label' if role == 'You' else 'assistant_label'
+
+
+def _entry_segments(idx: int):
+    # Formatted (text, tag) pieces for one full_history entry, cached because
+    # entries never change once appended (the cache is cleared on new/load)
+    segments = _render_cache.get(idx)
+    if segments is None:
+        fh = STATE.full_history
+        role, msg, ts, tag = fh.roles[idx], fh.msgs[idx], fh.ts[idx], fh.tags[idx]
+        segments = [(role, (tag,))]
+        # The timestamp is always rendered, tagged so it can be hidden by eliding
+        if ts:
+            segments.append((f" [{_fmt_ts(ts)}]", ('timestamp',)))
+        segments.append((f": {msg}\n\n", ()))
+        # extra spacer for assistant replies
+        if role != 'You':
+            segments.append(("\n", ()))
+        _render_cache[idx] = segments
+    return segments
+
+
+def format_transcript(start: int, end: int) -> list:
+    # Interleaved chars, tags, chars, tags... for full_history[start:end], plain
+    # Python with no Tk calls (only _insert_entries hands the result to the widget)
+    args = []
+    for idx in range(start, end):
+        for text, tags in _entry_segments(idx):
+            args += (text, tags)
+    return args
+
+
+def _insert_entries(start: int, end: int, index: str = tk.END):
+    # Insert full_history[start:end] at index (chat_area must already be writable)
+    # Text.insert takes interleaved (chars, tags) pairs, so the whole batch goes
+    # to Tcl in a single call
+    args = format_transcript(start, end)
+    if args:
+        chat_area.insert(index, *args)
+
+
+def append_history_entry(follow: bool = None):
+    # Insert just the newest full_history entry without re-rendering earlier ones,
+    # scrolling along only if the view was at the bottom (or follow says so)
+    if not STATE.full_history:
+        return
+    if follow is None:
+        follow = _chat_at_bottom()
+    chat_area.config(state=tk.NORMAL)
+    _insert_entries(len(STATE.full_history) - 1, len(STATE.full_history))
+    _trim_chat_area(CHAT_MAX_LINES)
+    if follow:
+        chat_area.see(tk.END)
+    chat_area.config(state=tk.DISABLED)
+
+
+def _trim_chat_area(max_lines: int):
+    # Drop the oldest rendered entries while the widget holds more than max_lines,
+    # whole entries are removed (counted by newlines) so _rendered_start stays accurate
+    global _rendered_start
+    while _rendered_start < len(STATE.full_history) - 1:
+        n = int(chat_area.index('end-1c').split('.')[0])
+        if n <= max_lines:
+            break
+        lines = sum(text.count('\n') for text, _ in _entry_segments(_rendered_start))
+        chat_area.delete('1.0', f'{lines + 1}.0')
+        _rendered_start += 1
+
+
+def _on_chat_yscroll(first, last):
+    global _page_in_pending
+    chat_area.vbar.set(first, last)
+    # When the view reaches the top and older entries are not yet shown, page them in
+    if float(first) <= 0.0 and _rendered_start > 0 and not _page_in_pending:
+        _page_in_pending = True
+        root.after_idle(_page_in_older)
+
+
+def _page_in_older():
+    global _rendered_start, _page_in_pending
+    _page_in_pending = False
+    if _rendered_start <= 0:
+        return
+    new_start = max(0, _rendered_start - CHAT_RENDER_WINDOW)
+    chat_area.config(state=tk.NORMAL)
+    # A right-gravity mark at the top keeps successive inserts in order and ends
+    # up at the previously-first entry, so the view can stay where it was
+    chat_area.mark_set('page_in', '1.0')
+    chat_area.mark_gravity('page_in', tk.RIGHT)
+    _insert_entries(new_start, _rendered_start, 'page_in')
     chat_area.config(state=tk.DISABLED)
+    _rendered_start = new_start
+    chat_area.yview('page_in')
+
+
+def replace_placeholder():
+    # Replace the "is thinking..." placeholder with the newest full_history entry.
+    # Once the placeholder is gone (e.g. a late reply after a timeout) this is a plain append
+    follow = _chat_at_bottom()
+    try:
+        chat_area.config(state=tk.NORMAL)
+        chat_area.delete('ai_placeholder', tk.END)
+        chat_area.mark_unset('ai_placeholder')
+    except tk.TclError:
+        pass
+    append_history_entry(follow)
+
+
+def apply_timestamp_visibility():
+    # Timestamps stay in the chat text under the 'timestamp' tag, toggling them
+    # only flips the tag's elide option instead of re-rendering the conversation
+    try:
+        chat_area.tag_configure('timestamp', elide=not show_timestamps_var.get())
+    except tk.TclError:
+        pass
+
+
+def _visible_lines() -> int:
+    # Text rows that fit in the chat area (its configured height until it is mapped)
+    try:
+        rows = int(chat_area.cget('height'))
+        pixels = chat_area.winfo_height()
+        if pixels > 1:
+            linespace = int(chat_area.tk.call('font', 'metrics', chat_area.cget('font'), '-linespace'))
+            rows = max(1, pixels // max(1, linespace))
+        return rows
+    except Exception:
+        return 20
+
+
+def _render_window_start() -> int:
+    # First full_history index to render so the newest entries fill about two
+    # screens (at most CHAT_RENDER_WINDOW entries), older ones are paged in on scroll
+    budget = 2 * _visible_lines()
+    end = len(STATE.full_history)
+    start = end
+    lines = 0
+    while start > 0 and lines < budget and end - start < CHAT_RENDER_WINDOW:
+        start -= 1
+        lines += sum(text.count('\n') for text, _ in _entry_segments(start))
+    return start
 
 
 def render_history():
+    global _rendered_start, _rendered_version
+    # Nothing to do if the chat area already shows this exact history
+    key = (id(STATE.full_history), STATE.full_history.version)
+    if key == _rendered_version:
+        return
     chat_area.config(state=tk.NORMAL)
     chat_area.delete(1.0, tk.END)
+    # A full re-render leaves no placeholder to replace
+    chat_area.mark_unset('ai_placeholder')
 
     # Show the full, untrimmed conversation to the user (full_history)
     # `history` remains the trimmed list used for model context
-    for entry_item in full_history:
-        if len(entry_item) >= 3:
-            role, msg, ts = entry_item[0], entry_item[1], entry_item[2]
-        elif len(entry_item) == 2:
-            role, msg = entry_item[0], entry_item[1]
-            ts = ''
-        else:
-            continue
-        # Respect the show_timestamps_var toggle (hide timestamps when unchecked)
-        try:
-            show_ts = show_timestamps_var.get()
-        except Exception:
-            show_ts = True
-        # Use the labeled insertion helper so role labels are colored
-        try:
-            insert_labeled_message(role, msg, ts)
-        except Exception:
-            # fallback to plain insertion
-            ts_text = f" [{ts}]" if (ts and show_ts) else ''
-            chat_area.insert(tk.END, f"{role}{ts_text}: {msg}\n\n")
+    # Only the most recent screenfuls are inserted here, older entries are paged in
+    # by _on_chat_yscroll once the user scrolls to the top
+    _rendered_start = _render_window_start()
+    _insert_entries(_rendered_start, len(STATE.full_history))
     chat_area.see(tk.END)
     chat_area.config(state=tk.DISABLED)
+    _rendered_version = key
 
 
 def on_exit():
     # If there are unsaved changes, prompt the user to save
     try:
-        if unsaved_changes:
+        # The flag can be stale, only ask when the conversation really differs
+        # from what was last saved/loaded
+        if STATE.unsaved_changes and _history_digest() != STATE.saved_digest:
             resp = messagebox.askyesnocancel('Save before exit', 'You have unsaved changes. Save before exiting?')
             # Yes -> attempt save; if save succeeds exit, otherwise abort
             if resp is True:
                 ok = save_conversation()
                 if ok:
-                    root.destroy()
+                    _close_after_prefs_flush()
                 else:
                     return
             # No -> exit without saving
             elif resp is False:
-                root.destroy()
+                _close_after_prefs_flush()
             # Cancel -> do nothing
             else:
                 return
         else:
-            root.destroy()
+            _close_after_prefs_flush()
     except Exception:
-        try:
-            root.destroy()
-        except Exception:
-            pass
+        _safe(root.destroy)
+
+
+def _close_after_prefs_flush():
+    # Extract preferences from messages the extractor has not seen yet before closing.
+    # The window is hidden but the mainloop keeps running until the extraction is done
+    # (it reads Tk variables from the network loop) or PREFS_FLUSH_TIMEOUT passes
+    fut = flush_pending_prefs()
+    if fut is None:
+        root.destroy()
+        return
+    _safe(root.withdraw)
+    deadline = time.monotonic() + PREFS_FLUSH_TIMEOUT
+
+    def poll():
+        if fut.done() or time.monotonic() >= deadline:
+            _safe(root.destroy)
+        else:
+            root.after(100, poll)
+
+    poll()
+
+def _set_timer_resolution(fine: bool):
+    # On Windows, ask for 1ms timer resolution while the app runs so root.after
+    # callbacks fire close to schedule instead of on ~15ms ticks (no-op elsewhere)
+    if os.name != 'nt':
+        return
+    try:
+        import ctypes
+        if fine:
+            ctypes.windll.winmm.timeBeginPeriod(1)
+        else:
+            ctypes.windll.winmm.timeEndPeriod(1)
+    except Exception:
+        pass
 
 # Main Execution
 
 if __name__ == '__main__':
-    build_main_window()
-    root.mainloop()
+    _set_timer_resolution(True)
+    try:
+        build_main_window()
+        root.mainloop()
+    finally:
+        # Every timeBeginPeriod needs a matching timeEndPeriod
+        _set_timer_resolution(False)